@@ -0,0 +1,669 @@
+from datetime import datetime, timedelta
+
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.image import Image
+from kivy.uix.popup import Popup
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import (MDRaisedButton, MDFlatButton,
+                               MDRectangleFlatButton)
+from kivymd.uix.card import MDCard
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.label import MDLabel
+from kivymd.uix.menu import MDDropdownMenu
+from kivymd.uix.textfield import MDTextField
+
+import services
+from services import db_executor, events, order_feed
+from models import (OrderStatus, MenuItem, OrderRow, ACTIVE_ORDER_STATUSES,
+                    to_menu_item_row)
+from render_profile import profiled_screens, profiler
+from screens import show_screen, find_row_index, menu_item_texture
+from widgets import (build_recycle_view, loading_label, BarChart,
+                     AdminOrderCard, AdminMenuItemCard)
+
+ORDERS_PAGE_SIZE = 20
+
+# Sales chart granularity -> how far back the chart reaches
+SALES_CHART_RANGES = {'day': timedelta(days=14), 'hour': timedelta(hours=48)}
+
+
+@profiled_screens
+class AdminPage:
+    def __init__(self, screen_manager, login_page_entrance):
+        self.dialog = None
+        self.screen_manager = screen_manager
+        self.login_page_entrance = login_page_entrance
+        self.order_statuses = set(ACTIVE_ORDER_STATUSES)
+        self.status_counts = dict.fromkeys(OrderStatus, 0)
+        self.status_filter = None
+        self.orders_view = None
+        self.orders_loading = None
+        self.orders_cursor = None
+        self.orders_exhausted = False
+        self.menu_view = None
+        self.stats_labels = []
+        self.sales_chart = None
+        self.sales_title = None
+        self.sales_granularity = 'day'
+        events.bind(on_order_placed=self.on_order_placed,
+                    on_order_status_changed=self.on_order_status_changed,
+                    on_order_deleted=self.on_order_deleted,
+                    on_orders_reset=self.on_orders_reset,
+                    on_menu_item_saved=self.on_menu_item_saved,
+                    on_menu_item_deleted=self.on_menu_item_deleted)
+
+    def show_admin_order_screen(self, *_):
+        show_screen(self.screen_manager, 'admin_orders',
+                    self.build_admin_order_screen)
+
+    def build_admin_order_screen(self, orders_screen):
+        # Create a recycled list of order cards
+        self.orders_view = build_recycle_view(AdminOrderCard, dp(250),
+                                              dp(700))
+        self.orders_view.bind(scroll_y=self.on_orders_scroll)
+        self.status_filter = MDBoxLayout(orientation='horizontal',
+                                         padding=dp(12), spacing=dp(12),
+                                         size_hint_y=None, height=dp(64))
+        self.orders_loading = loading_label()
+        self.reload_orders()
+
+        back_button = MDRectangleFlatButton(text="Back to Login",
+                                            size_hint=(None, None),
+                                            size=(dp(150), dp(50)),
+                                            on_release=self.back_to_login)
+        orders_menu = MDRectangleFlatButton(text="Edit menu",
+                                            size_hint=(None, None),
+                                            size=(dp(150), dp(50)),
+                                            on_release=self.back_to_menu)
+
+        stats_menu = MDRectangleFlatButton(text="Stats",
+                                           size_hint=(None, None),
+                                           size=(dp(150), dp(50)),
+                                           on_release=self.back_to_stats)
+        refresh_button = MDRectangleFlatButton(text="Refresh",
+                                               size_hint=(None, None),
+                                               size=(dp(150), dp(50)),
+                                               on_release=self.reload_orders)
+
+        # Create grid layout for footer buttons
+        buttons_layout = MDBoxLayout(orientation='horizontal', padding=dp(12),
+                                     spacing=dp(12), size_hint_y=None,
+                                     height=dp(74))
+        buttons_layout.add_widget(orders_menu)
+        buttons_layout.add_widget(stats_menu)
+        buttons_layout.add_widget(refresh_button)
+        buttons_layout.add_widget(back_button)
+
+        # Stack the orders list, status filter and footer buttons
+        orders_layout = MDBoxLayout(orientation='vertical')
+        orders_layout.add_widget(self.orders_view)
+        orders_layout.add_widget(self.status_filter)
+        orders_layout.add_widget(buttons_layout)
+        orders_screen.add_widget(orders_layout)
+        orders_screen.add_widget(self.orders_loading)
+
+    def reload_orders(self, *_):
+        db_executor.cancel('admin_orders')
+        self.orders_cursor = None
+        self.orders_exhausted = False
+        self.orders_view.data = []
+        self.orders_view.scroll_y = 1
+        self.load_orders_page()
+        self.refresh_status_counts()
+
+    def load_orders_page(self):
+        if self.orders_exhausted or db_executor.is_pending('admin_orders'):
+            return
+        self.orders_loading.opacity = 1
+        db_executor.submit(services.admin_manager.get_orders_page,
+                           tuple(self.order_statuses),
+                           after=self.orders_cursor, limit=ORDERS_PAGE_SIZE,
+                           tag='admin_orders',
+                           on_result=self.on_orders_page)
+
+    def on_orders_page(self, orders):
+        self.orders_loading.opacity = 0
+        if len(orders) < ORDERS_PAGE_SIZE:
+            self.orders_exhausted = True
+        if orders:
+            self.orders_cursor = (orders[-1].created_at, orders[-1].id)
+        self.orders_view.data.extend(self.order_data(order)
+                                     for order in orders)
+
+    def order_data(self, order: OrderRow) -> dict:
+        return {'status_handler': self.show_status_menu, 'row': order}
+
+    def on_orders_scroll(self, scroll_view, scroll_y):
+        # scroll_y reaches 0 at the bottom of the list
+        if scroll_y <= 0.05:
+            self.load_orders_page()
+
+    def refresh_status_counts(self):
+        self.populate_status_filter()
+        db_executor.submit(services.admin_manager.count_orders_by_status,
+                           tag='admin_status_counts',
+                           on_result=self.on_status_counts)
+
+    def on_status_counts(self, counts):
+        self.status_counts = counts
+        self.populate_status_filter()
+
+    def populate_status_filter(self):
+        self.status_filter.clear_widgets()
+        for status in OrderStatus:
+            button_class = (MDRaisedButton if status in self.order_statuses
+                            else MDRectangleFlatButton)
+            button = button_class(
+                text=f"{status.value.title()} ({self.status_counts[status]})",
+                on_release=lambda _, status=status: self.toggle_status_filter(
+                    status))
+            self.status_filter.add_widget(button)
+
+    def toggle_status_filter(self, status: OrderStatus):
+        if status in self.order_statuses:
+            self.order_statuses.discard(status)
+        else:
+            self.order_statuses.add(status)
+        self.reload_orders()
+
+    def show_status_menu(self, button):
+        menu = MDDropdownMenu(
+            caller=button,
+            items=[{"viewclass": "OneLineListItem",
+                    "text": OrderStatus.CREATED.value.title(),
+                    "on_release": lambda: self.on_status_change(button.order_id,
+                                                                OrderStatus.CREATED.value)},
+                   {"viewclass": "OneLineListItem",
+                    "text": OrderStatus.COOKING.value.title(),
+                    "on_release": lambda: self.on_status_change(button.order_id,
+                                                                OrderStatus.COOKING.value)},
+                   {"viewclass": "OneLineListItem",
+                    "text": OrderStatus.CANCELLED.value.title(),
+                    "on_release": lambda: self.on_status_change(button.order_id,
+                                                                OrderStatus.CANCELLED.value)},
+                   {"viewclass": "OneLineListItem",
+                    "text": OrderStatus.READY.value.title(),
+                    "on_release": lambda: self.on_status_change(button.order_id,
+                                                                OrderStatus.READY.value)},
+                   {"viewclass": "OneLineListItem",
+                    "text": OrderStatus.DONE.value.title(),
+                    "on_release": lambda: self.on_status_change(button.order_id,
+                                                                OrderStatus.DONE.value)}
+                   ],
+            width_mult=4
+        )
+        # menu.bind(on_release=self.on_status_change)  # Bind on_release event
+        menu.open()
+        self.dialog = menu
+
+    def on_status_change(self, order_id: int, status: str):
+        self.dismiss_dialog()
+        db_executor.submit(services.admin_manager.update_order_status, order_id,
+                           OrderStatus(status),
+                           on_result=lambda _: order_feed.poll())
+
+    def on_order_status_changed(self, _, order_id, status):
+        if self.orders_view is None:
+            return
+        data = self.orders_view.data
+        index = find_row_index(data, order_id)
+        if index is not None:
+            old_status = data[index]['row'].status
+            self.status_counts[old_status] -= 1
+            self.status_counts[status] += 1
+            self.populate_status_filter()
+            if status in self.order_statuses:
+                data[index] = self.order_data(
+                    data[index]['row']._replace(status=status))
+            else:
+                data.pop(index)
+        else:
+            self.refresh_status_counts()
+
+    def on_order_placed(self, _, order):
+        # Already there when the page loaded after the order was placed
+        if self.orders_view is None or find_row_index(
+                self.orders_view.data, order.id) is not None:
+            return
+        self.status_counts[order.status] += 1
+        self.populate_status_filter()
+        if order.status in self.order_statuses:
+            self.orders_view.data.insert(0, self.order_data(order))
+
+    def on_order_deleted(self, _, order_id):
+        if self.orders_view is None:
+            return
+        index = find_row_index(self.orders_view.data, order_id)
+        if index is not None:
+            self.orders_view.data.pop(index)
+        self.refresh_status_counts()
+
+    def on_orders_reset(self, _):
+        if self.orders_view is not None:
+            self.reload_orders()
+
+    def show_admin_menu_screen(self, *_):
+        show_screen(self.screen_manager, 'admin',
+                    self.build_admin_menu_screen)
+
+    def build_admin_menu_screen(self, admin_screen):
+        self.menu_view = build_recycle_view(AdminMenuItemCard, dp(200))
+        menu_loading = loading_label()
+        menu_loading.opacity = 1
+        db_executor.submit(services.user_manager.list_menu_items, tag='admin_menu',
+                           on_result=lambda items: self.on_menu_items(
+                               items, menu_loading))
+
+        buttons_layout = MDBoxLayout(orientation='horizontal', padding=dp(12),
+                                     spacing=dp(12))
+        add_item_button = MDRaisedButton(text="Add Item", size_hint_x=None,
+                                         width=dp(120),
+                                         on_release=self.add_menu_item)
+        back_button = MDRaisedButton(text="Back to Login", size_hint_x=None,
+                                     width=dp(120),
+                                     on_release=self.back_to_login)
+        orders_button = MDRaisedButton(text="Orders", size_hint_x=None,
+                                       width=dp(120),
+                                       on_release=self.back_to_orders)
+        stats_menu = MDRaisedButton(text="Stats",
+                                    size_hint=(None, None),
+                                    size=(dp(150), dp(50)),
+                                    on_release=self.back_to_stats)
+        buttons_layout.add_widget(orders_button)
+        buttons_layout.add_widget(add_item_button)
+        buttons_layout.add_widget(back_button)
+        buttons_layout.add_widget(stats_menu)
+
+        admin_layout = MDBoxLayout(orientation='vertical')
+        admin_layout.add_widget(self.menu_view)
+        admin_screen.add_widget(admin_layout)
+        admin_screen.add_widget(buttons_layout)
+        admin_screen.add_widget(menu_loading)
+
+    def on_menu_items(self, items, menu_loading):
+        menu_loading.opacity = 0
+        self.menu_view.data = [self.menu_item_data(item) for item in items]
+
+    def menu_item_data(self, item) -> dict:
+        return {'texture_loader': menu_item_texture,
+                'edit_handler': self.on_edit_item,
+                'delete_handler': self.on_delete_item,
+                'row': item}
+
+    def on_menu_item_saved(self, _, item):
+        if self.menu_view is None:
+            return
+        index = find_row_index(self.menu_view.data, item.id)
+        if index is None:
+            self.menu_view.data.append(self.menu_item_data(item))
+        else:
+            self.menu_view.data[index] = self.menu_item_data(item)
+
+    def on_menu_item_deleted(self, _, menu_item_id):
+        if self.menu_view is None:
+            return
+        index = find_row_index(self.menu_view.data, menu_item_id)
+        if index is not None:
+            self.menu_view.data.pop(index)
+
+    def on_edit_item(self, item):
+        db_executor.submit(services.user_manager.get_menu_item_by_id, item.id,
+                           on_result=self.show_edit_popup)
+
+    def on_delete_item(self, item):
+        db_executor.submit(services.user_manager.get_menu_item_by_id, item.id,
+                           on_result=self.show_delete_popup)
+
+    def save_menu_item(self, item):
+        db_executor.submit(services.admin_manager.insert_menu_item, item,
+                           on_result=lambda _: events.dispatch(
+                               'on_menu_item_saved', to_menu_item_row(item)))
+
+    def save_menu_item_with_image(self, item, image_path):
+        # The upload is read, hashed and written on the worker thread; the
+        # item is saved once the image is in the store
+        def on_image_stored(image_key):
+            item.image_key = image_key
+            services.thumbnails.submit(image_key)
+            self.save_menu_item(item)
+
+        db_executor.submit(services.image_store.put_file, image_path,
+                           on_result=on_image_stored,
+                           on_error=self.on_image_upload_failed)
+
+    def on_image_upload_failed(self, error):
+        dialog = MDDialog(title="Error",
+                          text=f"The image could not be uploaded: {error}",
+                          size_hint=(0.7, 0.3),
+                          auto_dismiss=True,
+                          buttons=[MDFlatButton(text="OK",
+                                                on_release=self.dismiss_dialog)])
+        dialog.open()
+        self.dialog = dialog
+
+    def show_delete_popup(self, item):
+        popup_content = BoxLayout(orientation='vertical', padding=dp(24),
+                                  spacing=dp(16))
+
+        delete_button = MDRaisedButton(text="Delete", size_hint=(None, None),
+                                       size=(150, 50))
+        cancel_button = MDRaisedButton(text="Cancel", size_hint=(None, None),
+                                       size=(150, 50))
+        delete_button.bind(
+            on_release=lambda button: self.delete_menu_item(item))
+        cancel_button.bind(
+            on_release=self.dismiss_dialog)
+        popup_content.add_widget(delete_button)
+        popup_content.add_widget(cancel_button)
+
+        popup = Popup(title="Are you sure you want to delete this item?",
+                      content=popup_content,
+                      size_hint=(None, None), size=(600, 500),
+                      separator_color=[0, 0, 0, 1],
+                      title_color=[0, 0, 0, 1],
+                      title_align='center',
+                      background_color=[255, 255, 255, 255])
+
+        popup.open()
+        self.dialog = popup
+
+    def delete_menu_item(self, item):
+        self.dismiss_dialog()
+        db_executor.submit(services.admin_manager.delete_menu_item, item,
+                           on_result=lambda _: events.dispatch(
+                               'on_menu_item_deleted', item.id))
+
+    def show_edit_popup(self, item):
+        # Create a popup window for editing menu item properties
+        self.cur_menu_item_edit = item
+        popup_content = BoxLayout(orientation='vertical', padding=dp(15),
+                                  spacing=dp(16))
+
+        # Add text input fields for editing menu item properties
+        name_input = MDTextField(text=item.name, hint_text="Name",
+                                 foreground_color=(0, 0, 0, .4))
+        price_input = MDTextField(text=str(item.price), hint_text="Price")
+        weight_input = MDTextField(text=str(item.weight), hint_text="Weight")
+        radius_input = MDTextField(text=str(item.radius), hint_text="Radius")
+        description_input = MDTextField(text=item.description,
+                                        hint_text="Description")
+
+        popup_content.add_widget(name_input)
+        popup_content.add_widget(price_input)
+        popup_content.add_widget(weight_input)
+        popup_content.add_widget(radius_input)
+        popup_content.add_widget(description_input)
+
+        # Add a button to select a new image
+        choose_image_button = MDRaisedButton(text="Choose Image")
+        choose_image_button.bind(
+            on_release=lambda button: self.choose_image(popup_content))
+        popup_content.add_widget(choose_image_button)
+
+        # Add a button to save changes
+        save_button = MDRaisedButton(text="Save Changes",
+                                     size_hint=(None, None), size=(150, 50))
+        save_button.bind(
+            on_release=lambda button: self.save_menu_item_changes(item,
+                                                                  name_input.text,
+                                                                  float(
+                                                                      price_input.text),
+                                                                  description_input.text,
+                                                                  float(
+                                                                      weight_input.text),
+                                                                  float(
+                                                                      radius_input.text)))
+        popup_content.add_widget(save_button)
+
+        # Create and open the popup
+        popup = Popup(title="Edit Menu Item", content=popup_content,
+                      size_hint=(None, None), size=(800, 1150),
+                      separator_color=[0, 0, 0, 1],
+                      title_color=[0, 0, 0, 1],
+                      title_align='center',
+                      background_color=[255, 255, 255, 255])
+        popup.open()
+        self.dialog = popup
+
+    def choose_image(self, popup_content):
+        # The file chooser is only needed here, so it isn't loaded at startup
+        from kivy.uix.filechooser import FileChooserIconView
+
+        self.dialog.background_color = [0, 0, 0, 1]
+        # Create a file chooser to select an image
+        file_chooser = FileChooserIconView()
+        file_chooser.path = '.'  # Set initial path
+        file_chooser.bind(
+            on_submit=lambda chooser, path, _: self.on_image_selected(path,
+                                                                      popup_content))
+
+        # Clear existing widgets and add the file chooser
+        popup_content.clear_widgets()
+        popup_content.add_widget(file_chooser)
+
+    def on_image_selected(self, path, popup_content):
+        # Show the selected image in the popup and provide an option to upload it
+        image_preview = Image(source=path[0])
+        upload_button = Button(text="Upload Image")
+        upload_button.bind(on_release=lambda button: self.upload_image(path))
+
+        # Clear existing widgets and add the image preview and upload button
+        popup_content.clear_widgets()
+        popup_content.add_widget(image_preview)
+        popup_content.add_widget(upload_button)
+
+    def upload_image(self, path):
+        self.save_menu_item_with_image(self.cur_menu_item_edit, path[0])
+        self.cur_menu_item_edit = None
+        self.dismiss_dialog()
+
+    def save_menu_item_changes(self, item, name, price, description, weight,
+                               radius):
+        item.name = name
+        item.price = price
+        item.description = description
+        item.weight = weight
+        item.radius = radius
+        self.save_menu_item(item)
+        self.dismiss_dialog()
+
+    def dismiss_dialog(self, *_):
+        if self.dialog is not None:
+            self.dialog.dismiss()
+
+    def add_menu_item(self, _):
+        from kivy.uix.filechooser import FileChooserIconView
+
+        # Create a popup window for adding a new menu item
+        popup_content = BoxLayout(orientation='vertical', padding=dp(24),
+                                  spacing=dp(4))
+
+        # Add a label indicating to upload a photo
+        upload_label = MDLabel(text="Upload Your Photo", size_hint_y=None,
+                               height=dp(40))
+        popup_content.add_widget(upload_label)
+
+        # Add a file chooser for uploading a photo
+        file_chooser = FileChooserIconView(height=300)
+        file_chooser.path = '.'  # Set initial path
+        self.selected_img = None
+
+        def set_img(path):
+            self.selected_img = path[0]
+
+        file_chooser.bind(
+            on_submit=lambda chooser, path, _: set_img(path))
+        popup_content.add_widget(file_chooser)
+
+        # Add text input fields for editing menu item properties
+        name_input = MDTextField(hint_text="Name", size=(50, 50))
+        price_input = MDTextField(hint_text="Price", size=(50, 50))
+        weight_input = MDTextField(hint_text="Weight", size=(50, 50))
+        radius_input = MDTextField(hint_text="Radius", size=(50, 50))
+        description_input = MDTextField(hint_text="Description", size=(50, 50))
+
+        popup_content.add_widget(name_input)
+        popup_content.add_widget(price_input)
+        popup_content.add_widget(weight_input)
+        popup_content.add_widget(radius_input)
+        popup_content.add_widget(description_input)
+
+        # Add a button to save changes
+        save_button = MDRaisedButton(text="Save Changes",
+                                     size_hint=(None, None), size=(150, 50))
+        save_button.bind(
+            on_release=lambda button: self.save_add_menu_item_changes(
+                name_input.text,
+                float(price_input.text),
+                description_input.text,
+                float(weight_input.text),
+                float(radius_input.text)))  # Pass the selected photo preview
+        popup_content.add_widget(save_button)
+
+        # Create and open the popup
+        popup = Popup(title="Add new menu item", content=popup_content,
+                      size_hint=(None, None), size=(1000, 1150),
+                      separator_color=[0, 0, 0, 1],
+                      title_color=[0, 0, 0, 1],
+                      title_align='center',
+                      background_color=[255, 255, 255, 255])
+        popup.open()
+        self.dialog = popup
+
+    def save_add_menu_item_changes(self, name, price, description, weight,
+                                   radius):
+        # Handle saving the new menu item, including the photo
+        item = MenuItem()
+        item.name = name
+        item.price = price
+        item.description = description
+        item.weight = weight
+        item.radius = radius
+        if self.selected_img:
+            self.save_menu_item_with_image(item, self.selected_img)
+        else:
+            self.save_menu_item(item)
+        self.dismiss_dialog()
+
+    def show_admin_stats_screen(self, *_):
+        show_screen(self.screen_manager, 'admin_stats',
+                    self.build_admin_stats_screen)
+        self.refresh_admin_stats()
+
+    def build_admin_stats_screen(self, stats_screen):
+        card = MDCard(size_hint_y=None, height=dp(300), padding=dp(16),
+                      spacing=dp(8), pos_hint={"top": 1})
+        card.md_bg_color = "#E0E0E0"
+
+        self.stats_labels = [
+            MDLabel(halign='center', font_style='H6'),
+            MDLabel(halign='center'),
+            MDLabel(halign='center'),
+            MDLabel(halign='center'),
+        ]
+        for label in self.stats_labels:
+            card.add_widget(label)
+        # Hidden from guests: a triple tap on the order count switches
+        # render profiling on or off
+        self.stats_labels[0].bind(on_touch_down=self.on_stats_title_touch)
+
+        chart_card = MDCard(orientation='vertical', padding=dp(16),
+                            spacing=dp(8))
+        chart_card.md_bg_color = "#E0E0E0"
+        self.sales_title = MDLabel(halign='center', size_hint_y=None,
+                                   height=dp(32))
+        self.sales_chart = BarChart()
+        chart_card.add_widget(self.sales_title)
+        chart_card.add_widget(self.sales_chart)
+
+        # Leaves room at the bottom for the footer buttons
+        content_layout = MDBoxLayout(orientation='vertical', spacing=dp(12),
+                                     padding=(0, 0, 0, dp(74)))
+        content_layout.add_widget(card)
+        content_layout.add_widget(chart_card)
+
+        back_button = MDRectangleFlatButton(text="Back",
+                                            size_hint=(None, None),
+                                            size=(dp(150), dp(50)),
+                                            on_release=self.back_to_orders)
+        days_button = MDRectangleFlatButton(
+            text="Last 14 days", size_hint=(None, None),
+            size=(dp(150), dp(50)),
+            on_release=lambda _: self.show_sales_chart('day'))
+        hours_button = MDRectangleFlatButton(
+            text="Last 48 hours", size_hint=(None, None),
+            size=(dp(150), dp(50)),
+            on_release=lambda _: self.show_sales_chart('hour'))
+
+        # Create grid layout for footer buttons
+        buttons_layout = MDBoxLayout(orientation='horizontal', padding=dp(12),
+                                     spacing=dp(12))
+
+        buttons_layout.add_widget(back_button)
+        buttons_layout.add_widget(days_button)
+        buttons_layout.add_widget(hours_button)
+
+        stats_screen.add_widget(content_layout)
+        stats_screen.add_widget(buttons_layout)
+
+    def on_stats_title_touch(self, label, touch):
+        if not (label.collide_point(*touch.pos) and touch.is_triple_tap):
+            return
+        state = "on" if profiler.toggle() else "off"
+        dialog = MDDialog(title="Render profiling",
+                          text=f"Render profiling is {state}. Reports are "
+                               f"written to {profiler.report_path}.",
+                          size_hint=(0.7, 0.3),
+                          auto_dismiss=True,
+                          buttons=[MDFlatButton(text="OK",
+                                                on_release=self.dismiss_dialog)])
+        dialog.open()
+        self.dialog = dialog
+
+    def refresh_admin_stats(self):
+        for label in self.stats_labels:
+            label.text = "Loading..."
+
+        db_executor.submit(services.admin_manager.get_dashboard, tag='admin_stats',
+                           on_result=self.show_stats)
+        self.show_sales_chart(self.sales_granularity)
+
+    def show_sales_chart(self, granularity: str):
+        self.sales_granularity = granularity
+        self.sales_title.text = "Loading..."
+        end = datetime.utcnow()
+        db_executor.submit(services.admin_manager.get_sales_series,
+                           end - SALES_CHART_RANGES[granularity], end,
+                           granularity, tag='admin_sales',
+                           on_result=self.on_sales_series)
+
+    def on_sales_series(self, series):
+        self.sales_chart.values = [point.revenue for point in series]
+        self.sales_title.text = (
+            f"Revenue per {self.sales_granularity} since "
+            f"{series[0].bucket.strftime('%m/%d/%Y, %H:%M')} UTC: "
+            f"${sum(point.revenue for point in series):.2f}")
+
+    def show_stats(self, dashboard):
+        texts = (
+            f"Total number of orders: {dashboard.order_count}",
+            f"Total revenue: ${dashboard.revenue:.2f}",
+            f"Average order price: ${dashboard.avg_order_price:.2f}",
+            f"Average order size: {dashboard.avg_order_size:.1f} items",
+        )
+        for label, text in zip(self.stats_labels, texts):
+            label.text = text
+
+    def back_to_login(self, *_):
+        self.login_page_entrance()
+
+    def back_to_menu(self, *_):
+        self.show_admin_menu_screen()
+
+    def back_to_orders(self, *_):
+        self.show_admin_order_screen()
+
+    def back_to_stats(self, *_):
+        self.show_admin_stats_screen()
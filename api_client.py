@@ -0,0 +1,200 @@
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from api_codec import (ApiError, to_json, from_menu_item_row, from_order_row,
+                       from_order_changes, from_dashboard, from_user_stats,
+                       from_sales_point)
+from models import (MenuItem, MenuItemRow, OrderChanges, OrderRow,
+                    OrderStatus, User, DashboardStats, UserStats, SalesPoint)
+
+# Connections kept alive to the server: one per DB worker thread, with room
+# for the order feed
+POOL_SIZE = 4
+
+# Seconds to connect and to wait for a response
+TIMEOUT = (3.05, 30)
+
+# Retries on connection errors, e.g. a kept-alive connection the server has
+# since closed. A POST is only retried if it never reached the server, so an
+# order is not placed twice.
+RETRIES = 2
+
+
+class ApiClient:
+    # A requests.Session shared by the DB worker threads; its urllib3 pool
+    # is thread safe and keeps up to pool_size connections alive
+
+    def __init__(self, base_url: str, pool_size: int = POOL_SIZE,
+                 timeout: tuple[float, float] = TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=Retry(total=RETRIES,
+                                                backoff_factor=0.1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, path: str, params: dict | None = None,
+                body=None):
+        # Errors come back as the exceptions the managers would raise where
+        # there is one: ValueError for a bad request, LookupError when
+        # there is no such row
+        response = self.session.request(method, self.base_url + path,
+                                        params=params, json=body,
+                                        timeout=self.timeout)
+        if response.ok:
+            return response.json()
+        try:
+            message = response.json()['error']
+        except (ValueError, KeyError, TypeError):
+            message = response.reason
+        if response.status_code == 400:
+            raise ValueError(message)
+        if response.status_code == 404:
+            raise LookupError(message)
+        raise ApiError(response.status_code, message)
+
+    def get(self, path: str, **params):
+        return self.request('GET', path, params)
+
+    def post(self, path: str, body):
+        return self.request('POST', path, body=body)
+
+    def put(self, path: str, body, **params):
+        return self.request('PUT', path, params, body)
+
+    def delete(self, path: str):
+        return self.request('DELETE', path)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def cursor_params(after: tuple[datetime, int] | None) -> dict:
+    if after is None:
+        return {}
+    created_at, order_id = after
+    return {'after_created_at': created_at.isoformat(), 'after_id': order_id}
+
+
+class ApiUserManager:
+    # Stands in for UserManager against api_server.py; only the methods the
+    # app calls are here
+
+    def __init__(self, client: ApiClient):
+        self.__client = client
+
+    def add_user(self, user: User) -> None:
+        user.id = self.__client.post('/users', to_json(user))['id']
+
+    def delete_user(self, user_id: int) -> None:
+        self.__client.delete(f'/users/{user_id}')
+
+    def update_user(self, old_phone_number: str, user: User) -> User | None:
+        data = self.__client.put('/users', to_json(user),
+                                 phone_number=old_phone_number)
+        return User(**data) if data else None
+
+    def get_user(self, number: int) -> User | None:
+        data = self.__client.get('/users', phone_number=number)
+        return User(**data) if data else None
+
+    def get_user_by_id(self, id: int) -> User:
+        return User(**self.__client.get(f'/users/{id}'))
+
+    def list_menu_items(self) -> list[MenuItemRow]:
+        return [from_menu_item_row(item)
+                for item in self.__client.get('/menu')]
+
+    def get_menu_item_by_id(self, menu_item_id: int) -> MenuItem:
+        return MenuItem(**self.__client.get(f'/menu/{menu_item_id}'))
+
+    def search_menu_items(self, text: str = '',
+                          min_price: float | None = None,
+                          max_price: float | None = None,
+                          min_weight: int | None = None,
+                          max_weight: int | None = None,
+                          min_radius: int | None = None,
+                          max_radius: int | None = None,
+                          limit: int | None = None) -> list[MenuItemRow]:
+        # requests leaves out the parameters that are None
+        return [from_menu_item_row(item) for item in self.__client.get(
+            '/menu/search', text=text, min_price=min_price,
+            max_price=max_price, min_weight=min_weight,
+            max_weight=max_weight, min_radius=min_radius,
+            max_radius=max_radius, limit=limit)]
+
+    def place_order(self, user_id: int,
+                    quantities: dict[int, int]) -> OrderRow:
+        return from_order_row(self.__client.post(
+            '/orders', {'user_id': user_id, 'quantities': quantities}))
+
+    def get_order_history_page(self, user_id: int,
+                               after: tuple[datetime, int] | None = None,
+                               limit: int = 20) -> list[OrderRow]:
+        return [from_order_row(order) for order in self.__client.get(
+            f'/users/{user_id}/orders', limit=limit, **cursor_params(after))]
+
+    def get_user_stats(self, user_id: int) -> UserStats:
+        return from_user_stats(self.__client.get(f'/users/{user_id}/stats'))
+
+
+class ApiAdminManager:
+    # Stands in for AdminManager against api_server.py; only the methods
+    # the app calls are here
+
+    def __init__(self, client: ApiClient):
+        self.__client = client
+
+    def get_orders_page(self, statuses: list[OrderStatus] | None = None,
+                        after: tuple[datetime, int] | None = None,
+                        limit: int = 50) -> list[OrderRow]:
+        return [from_order_row(order) for order in self.__client.get(
+            '/orders', status=[status.name for status in statuses or ()],
+            limit=limit, **cursor_params(after))]
+
+    def get_order_change_position(self) -> int:
+        return self.__client.get('/orders/changes/position')
+
+    def get_order_changes(self, after: int,
+                          limit: int | None = None) -> OrderChanges:
+        return from_order_changes(self.__client.get(
+            '/orders/changes', after=after, limit=limit))
+
+    def count_orders_by_status(self) -> dict[OrderStatus, int]:
+        return self.get_dashboard().status_counts
+
+    def get_dashboard(self) -> DashboardStats:
+        return from_dashboard(self.__client.get('/stats'))
+
+    def get_sales_series(self, start: datetime, end: datetime,
+                         granularity: str = 'day',
+                         menu_item_id: int | None = None) -> list[SalesPoint]:
+        return [from_sales_point(point) for point in self.__client.get(
+            '/stats/sales', start=start.isoformat(), end=end.isoformat(),
+            granularity=granularity, menu_item_id=menu_item_id)]
+
+    def insert_menu_item(self, menu_item: MenuItem) -> None:
+        # Adds the item, or saves an edited one, and fills in its id
+        if menu_item.id is None:
+            data = self.__client.post('/menu', to_json(menu_item))
+        else:
+            data = self.__client.put(f'/menu/{menu_item.id}',
+                                     to_json(menu_item))
+        menu_item.id = data['id']
+
+    def delete_menu_item(self, menu_item: MenuItem) -> None:
+        self.__client.delete(f'/menu/{menu_item.id}')
+
+    def update_order_status(self, order_id: int,
+                            new_status: OrderStatus) -> None:
+        self.__client.put(f'/orders/{order_id}/status',
+                          {'status': new_status.name})
+
+    def is_valid_credentials(self, name: str, password: str) -> bool:
+        return self.__client.post('/admin/login',
+                                  {'name': name, 'password': password})
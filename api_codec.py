@@ -0,0 +1,75 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlmodel import SQLModel
+
+from models import (OrderStatus, MenuItemRow, OrderRow, OrderChanges,
+                    DashboardStats, UserStats, SalesPoint)
+
+# JSON for the API server and client. Row tuples travel as objects keyed by
+# field name, enums by name (as they are stored), datetimes as ISO 8601.
+# The from_* functions rebuild what the managers return, so pages can't
+# tell a local backend from a remote one.
+
+
+class ApiError(RuntimeError):
+    # A response the client has no better exception for
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def to_json(value):
+    if isinstance(value, SQLModel):
+        # Columns only; relationships aren't loaded outside a session
+        return to_json(value.model_dump())
+    if hasattr(value, '_asdict'):
+        return {name: to_json(field) for name, field in value._asdict().items()}
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key.name if isinstance(key, Enum) else key: to_json(field)
+                for key, field in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_json(item) for item in value]
+    return value
+
+
+def from_datetime(value: str | None) -> datetime | None:
+    return None if value is None else datetime.fromisoformat(value)
+
+
+def from_menu_item_row(data: dict) -> MenuItemRow:
+    return MenuItemRow(**data)
+
+
+def from_order_row(data: dict) -> OrderRow:
+    return OrderRow(**{**data,
+                       'created_at': from_datetime(data['created_at']),
+                       'status': OrderStatus[data['status']],
+                       'menu_items': tuple(data['menu_items'])})
+
+
+def from_order_changes(data: dict) -> OrderChanges:
+    return OrderChanges(
+        data['seq'], tuple(map(from_order_row, data['placed'])),
+        tuple((order_id, OrderStatus[status])
+              for order_id, status in data['status_changes']),
+        tuple(data['deleted']), data['complete'])
+
+
+def from_dashboard(data: dict) -> DashboardStats:
+    return DashboardStats(**{**data, 'status_counts': {
+        OrderStatus[status]: count
+        for status, count in data['status_counts'].items()}})
+
+
+def from_user_stats(data: dict) -> UserStats:
+    return UserStats(**data)
+
+
+def from_sales_point(data: dict) -> SalesPoint:
+    return SalesPoint(**{**data, 'bucket': from_datetime(data['bucket'])})
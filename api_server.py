@@ -0,0 +1,362 @@
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy.exc import IntegrityError, NoResultFound
+
+from api_codec import to_json
+from managers import AdminManager, UserManager, ORDER_CHANGES_BATCH
+from migrations import get_schema_version
+from models import MenuItem, OrderChanges, OrderStatus, User
+from order_changes import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# Terminals share one server instead of one SQLite file: it owns the engine
+# and its pool, reads run concurrently on the pool, and writes go through a
+# single lock so they never contend for SQLite's write lock. Start it with
+# `python api_server.py` and point the app at it with PIZZERIA_API_URL (see
+# api_client.py).
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+# As in services.py, which the server doesn't import as it pulls in Kivy
+DEFAULT_DATABASE_URL = 'sqlite:///./pizzeria.db'
+DEFAULT_PROFILE = 'production'
+
+# Seconds a kept-alive connection may sit idle before its thread closes it
+IDLE_TIMEOUT = 60
+
+
+class Route(NamedTuple):
+    method: str
+    pattern: re.Pattern
+    handler: Callable
+    writes: bool = False
+
+
+def route(method: str, path: str, handler: Callable,
+          writes: bool = False) -> Route:
+    # Path segments like {user_id} match digits and reach the handler as
+    # int keyword arguments
+    pattern = re.sub(r'\{(\w+)\}', r'(?P<\1>\\d+)', path)
+    return Route(method, re.compile(pattern), handler, writes)
+
+
+def query_value(query: dict[str, list[str]], name: str,
+                convert: Callable = str, default=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return convert(values[-1])
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid {name}: {values[-1]!r}") from None
+
+
+def order_status(name: str) -> OrderStatus:
+    try:
+        return OrderStatus[name]
+    except KeyError:
+        raise ValueError(f"Unknown order status {name!r}") from None
+
+
+def page_cursor(query: dict[str, list[str]]) -> tuple[datetime, int] | None:
+    # Keyset pages continue after (after_created_at, after_id)
+    created_at = query_value(query, 'after_created_at',
+                             datetime.fromisoformat)
+    order_id = query_value(query, 'after_id', int)
+    return None if created_at is None else (created_at, order_id)
+
+
+class PizzeriaApi:
+    # The manager operations the app uses, as JSON routes. Handlers take the
+    # parsed query string, the decoded JSON body and the path's ids, and
+    # return anything to_json can encode.
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.user_manager = UserManager(engine)
+        self.admin_manager = AdminManager(engine)
+        self.write_lock = threading.Lock()
+        self.__data_version = DataVersion(engine)
+        self.__position_lock = threading.Lock()
+        self.__position_version = None
+        self.__position = 0
+        self.routes = (
+            route('GET', '/health', self.health),
+            route('GET', '/menu', self.list_menu_items),
+            route('GET', '/menu/search', self.search_menu_items),
+            route('GET', '/menu/{menu_item_id}', self.get_menu_item),
+            route('POST', '/menu', self.save_menu_item, writes=True),
+            route('PUT', '/menu/{menu_item_id}', self.save_menu_item,
+                  writes=True),
+            route('DELETE', '/menu/{menu_item_id}', self.delete_menu_item,
+                  writes=True),
+            route('GET', '/users', self.get_user),
+            route('POST', '/users', self.add_user, writes=True),
+            route('PUT', '/users', self.update_user, writes=True),
+            route('GET', '/users/{user_id}', self.get_user_by_id),
+            route('DELETE', '/users/{user_id}', self.delete_user,
+                  writes=True),
+            route('GET', '/users/{user_id}/orders', self.order_history_page),
+            route('GET', '/users/{user_id}/stats', self.user_stats),
+            route('GET', '/orders', self.orders_page),
+            route('POST', '/orders', self.place_order, writes=True),
+            route('PUT', '/orders/{order_id}/status', self.update_order_status,
+                  writes=True),
+            route('GET', '/orders/changes', self.order_changes),
+            route('GET', '/orders/changes/position',
+                  self.order_change_position),
+            route('GET', '/stats', self.dashboard),
+            route('GET', '/stats/sales', self.sales_series),
+            route('POST', '/admin/login', self.is_valid_credentials),
+        )
+
+    def dispatch(self, method: str, path: str, query: dict[str, list[str]],
+                 body):
+        # Raises LookupError when no route matches
+        for candidate in self.routes:
+            if candidate.method != method:
+                continue
+            match = candidate.pattern.fullmatch(path)
+            if match is None:
+                continue
+            ids = {name: int(value)
+                   for name, value in match.groupdict().items()}
+            if candidate.writes:
+                with self.write_lock:
+                    return candidate.handler(query, body, **ids)
+            return candidate.handler(query, body, **ids)
+        raise LookupError(f"No route for {method} {path}")
+
+    def health(self, query, body):
+        return {'schema_version': get_schema_version(self.engine)}
+
+    def list_menu_items(self, query, body):
+        return self.user_manager.list_menu_items()
+
+    def search_menu_items(self, query, body):
+        return self.user_manager.search_menu_items(
+            query_value(query, 'text', default=''),
+            **{name: query_value(query, name, convert)
+               for name, convert in (('min_price', float),
+                                     ('max_price', float),
+                                     ('min_weight', int), ('max_weight', int),
+                                     ('min_radius', int), ('max_radius', int),
+                                     ('limit', int))})
+
+    def get_menu_item(self, query, body, menu_item_id: int):
+        return self.user_manager.get_menu_item_by_id(menu_item_id)
+
+    def save_menu_item(self, query, body, menu_item_id: int | None = None):
+        # POST adds an item, PUT edits one in place
+        if menu_item_id is None:
+            item = MenuItem(**{**body, 'id': None})
+        else:
+            item = self.user_manager.get_menu_item_by_id(menu_item_id)
+            for name, value in body.items():
+                if name != 'id':
+                    setattr(item, name, value)
+        self.admin_manager.insert_menu_item(item)
+        return item
+
+    def delete_menu_item(self, query, body, menu_item_id: int):
+        self.admin_manager.delete_menu_item(
+            self.user_manager.get_menu_item_by_id(menu_item_id))
+
+    def get_user(self, query, body):
+        return self.user_manager.get_user(query_value(query, 'phone_number'))
+
+    def add_user(self, query, body):
+        user = User(**{**body, 'id': None})
+        self.user_manager.add_user(user)
+        return user
+
+    def update_user(self, query, body):
+        return self.user_manager.update_user(
+            query_value(query, 'phone_number'), User(**body))
+
+    def get_user_by_id(self, query, body, user_id: int):
+        return self.user_manager.get_user_by_id(user_id)
+
+    def delete_user(self, query, body, user_id: int):
+        self.user_manager.delete_user(user_id)
+
+    def order_history_page(self, query, body, user_id: int):
+        return self.user_manager.get_order_history_page(
+            user_id, page_cursor(query), query_value(query, 'limit', int, 20))
+
+    def user_stats(self, query, body, user_id: int):
+        return self.user_manager.get_user_stats(user_id)
+
+    def orders_page(self, query, body):
+        statuses = [order_status(name) for name in query.get('status', ())]
+        return self.admin_manager.get_orders_page(
+            statuses, page_cursor(query), query_value(query, 'limit', int, 50))
+
+    def place_order(self, query, body):
+        # JSON object keys are strings
+        return self.user_manager.place_order(
+            int(body['user_id']),
+            {int(menu_item_id): int(quantity)
+             for menu_item_id, quantity in body['quantities'].items()})
+
+    def update_order_status(self, query, body, order_id: int):
+        self.admin_manager.update_order_status(order_id,
+                                               order_status(body['status']))
+
+    def order_changes(self, query, body):
+        # Every terminal asks for this each second. Most of the time nothing
+        # was committed since the last ask, and the answer comes from one
+        # PRAGMA without reading a table.
+        after = query_value(query, 'after', int, 0)
+        if after >= self.__change_position():
+            return OrderChanges(after)
+        return self.admin_manager.get_order_changes(
+            after, query_value(query, 'limit', int, ORDER_CHANGES_BATCH))
+
+    def order_change_position(self, query, body):
+        return self.__change_position()
+
+    def dashboard(self, query, body):
+        return self.admin_manager.get_dashboard()
+
+    def sales_series(self, query, body):
+        return self.admin_manager.get_sales_series(
+            query_value(query, 'start', datetime.fromisoformat),
+            query_value(query, 'end', datetime.fromisoformat),
+            query_value(query, 'granularity', default='day'),
+            query_value(query, 'menu_item_id', int))
+
+    def is_valid_credentials(self, query, body):
+        return self.admin_manager.is_valid_credentials(body['name'],
+                                                       body['password'])
+
+    def __change_position(self) -> int:
+        # The newest seq in the change log, re-read only when the database
+        # has changed since the last time
+        with self.__position_lock:
+            version = self.__data_version.read()
+            if version != self.__position_version:
+                self.__position = self.admin_manager.get_order_change_position()
+                self.__position_version = version
+            return self.__position
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests, so a client's
+    # pooled connections are reused rather than reopened per call. Headers
+    # and body go out as separate writes, which Nagle's algorithm would
+    # hold back for the client's delayed ACK, about 40 ms per response.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    timeout = IDLE_TIMEOUT
+
+    def do_GET(self):
+        self.handle_api('GET')
+
+    def do_POST(self):
+        self.handle_api('POST')
+
+    def do_PUT(self):
+        self.handle_api('PUT')
+
+    def do_DELETE(self):
+        self.handle_api('DELETE')
+
+    def handle_api(self, method: str) -> None:
+        url = urlsplit(self.path)
+        try:
+            body = self.read_body()
+            result = self.server.api.dispatch(method, url.path,
+                                              parse_qs(url.query), body)
+        except (LookupError, NoResultFound) as error:
+            self.send_json(404, {'error': str(error)})
+        except IntegrityError as error:
+            self.send_json(409, {'error': str(error.orig)})
+        except (ValueError, TypeError, KeyError) as error:
+            self.send_json(400, {'error': str(error)})
+        except Exception as error:
+            logger.exception("%s %s failed", method, self.path)
+            self.send_json(500, {'error': str(error)})
+        else:
+            self.send_json(200, to_json(result))
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def send_json(self, status: int, value) -> None:
+        payload = json.dumps(value).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    # One thread per connection; they exit with the process
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], api: PizzeriaApi):
+        super().__init__(address, ApiRequestHandler)
+        self.api = api
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(engine, host: str = DEFAULT_HOST,
+                 port: int = 0) -> ApiServer:
+    # Serves on a background thread, e.g. for trying the client against a
+    # scratch database on loopback; port 0 picks a free one. Stop it with
+    # shutdown() and server_close().
+    server = ApiServer((host, port), PizzeriaApi(engine))
+    threading.Thread(target=server.serve_forever, name='api-server',
+                     daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from db import PROFILES, create_db_engine
+    from image_store import ImageStore
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(
+        description="Serve the pizzeria database to kiosks over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="0.0.0.0 to accept other machines")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--database', default=DEFAULT_DATABASE_URL,
+                        help="SQLAlchemy URL")
+    parser.add_argument('--profile', choices=tuple(PROFILES),
+                        default=DEFAULT_PROFILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api_engine = create_db_engine(args.database, args.profile)
+    migrate(api_engine, ImageStore())
+    api_server = ApiServer((args.host, args.port), PizzeriaApi(api_engine))
+    logger.info("Serving on %s", api_server.url)
+    try:
+        api_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api_server.server_close()
@@ -0,0 +1,87 @@
+import os
+from typing import NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool, Pool, QueuePool
+from sqlmodel import create_engine
+
+from query_stats import tracker
+
+# Overrides the profile passed by the caller, e.g. PIZZERIA_DB_PROFILE=dev
+PROFILE_ENV = 'PIZZERIA_DB_PROFILE'
+
+
+class EngineProfile(NamedTuple):
+    journal_mode: str
+    synchronous: str
+    cache_size: int  # pages when positive, KiB when negative
+    mmap_size: int  # bytes
+    busy_timeout: int  # milliseconds
+    temp_store: str
+    poolclass: type[Pool]
+    pool_size: int
+    echo: bool
+
+
+PROFILES = {
+    # Logs every statement; the rest stays close to SQLite's defaults
+    'dev': EngineProfile(journal_mode='WAL', synchronous='NORMAL',
+                         cache_size=-2000, mmap_size=0, busy_timeout=5000,
+                         temp_store='DEFAULT', poolclass=QueuePool,
+                         pool_size=5, echo=True),
+    # WAL with synchronous=NORMAL only fsyncs at checkpoints and is still
+    # safe against application crashes
+    'production': EngineProfile(journal_mode='WAL', synchronous='NORMAL',
+                                cache_size=-64000, mmap_size=256 * 2 ** 20,
+                                busy_timeout=5000, temp_store='MEMORY',
+                                poolclass=QueuePool, pool_size=5,
+                                echo=False),
+    # Skips fsync entirely so runs measure our code rather than the disk,
+    # and has room for the load generator's writer threads
+    'benchmark': EngineProfile(journal_mode='WAL', synchronous='OFF',
+                               cache_size=-64000, mmap_size=256 * 2 ** 20,
+                               busy_timeout=30000, temp_store='MEMORY',
+                               poolclass=QueuePool, pool_size=16,
+                               echo=False),
+}
+
+
+def get_profile(name: str | None = None) -> EngineProfile:
+    name = os.environ.get(PROFILE_ENV, name or 'dev')
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile {name!r}, expected one "
+                         f"of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def create_db_engine(url: str, profile: str | None = None):
+    settings = get_profile(profile)
+    pool_options = {}
+    if settings.poolclass is not NullPool:
+        pool_options['pool_size'] = settings.pool_size
+    engine = create_engine(url, echo=settings.echo,
+                           poolclass=settings.poolclass, **pool_options)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, _):
+        # Runs once per new pooled connection, before it is handed out
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA journal_mode = {settings.journal_mode}')
+        cursor.execute(f'PRAGMA synchronous = {settings.synchronous}')
+        cursor.execute(f'PRAGMA cache_size = {settings.cache_size}')
+        cursor.execute(f'PRAGMA mmap_size = {settings.mmap_size}')
+        cursor.execute(f'PRAGMA busy_timeout = {settings.busy_timeout}')
+        cursor.execute(f'PRAGMA temp_store = {settings.temp_store}')
+        cursor.close()
+
+    # Idle unless PIZZERIA_SQL_STATS turns sampling on
+    tracker.install(engine)
+    return engine
+
+
+def begin_now(connection) -> None:
+    # pysqlite only opens its transaction before an INSERT, UPDATE or
+    # DELETE, so DDL run first on a connection commits on its own. This
+    # opens the transaction at once, taking the write lock up front.
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
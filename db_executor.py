@@ -0,0 +1,109 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from kivy.clock import Clock
+
+from query_stats import action_name, tracker
+from render_profile import profiler
+
+logger = logging.getLogger(__name__)
+
+
+class DbRequest:
+
+    def __init__(self, tag: str | None):
+        self.tag = tag
+        self.cancelled = False
+        self.future: Future | None = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class DbExecutor:
+    # Runs manager calls on a small worker pool and hands results back on the
+    # Kivy main thread. Managers open a Session per call inside the worker, so
+    # sessions and their pooled SQLite connections never cross threads; only
+    # detached instances and read rows travel back.
+    #
+    # submit() and delivery both run on the main thread, so the tag table
+    # needs no lock.
+
+    def __init__(self, max_workers: int = 2):
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers,
+                                             thread_name_prefix='db')
+        self.__requests: dict[str, DbRequest] = {}
+        self.__gate: Future | None = None
+
+    def submit(self, fn: Callable, *args, tag: str | None = None,
+               on_result: Callable | None = None,
+               on_error: Callable[[BaseException], None] | None = None,
+               **kwargs) -> DbRequest:
+        # A newer request with the same tag makes the older one stale: it is
+        # cancelled if still queued and its result dropped if already running
+        request = DbRequest(tag)
+        if tag is not None:
+            self.cancel(tag)
+            self.__requests[tag] = request
+        profile = profiler.attach_request()
+        request.future = self.__executor.submit(
+            self.__run, self.__gate, action_name(fn, tag), profile, fn, args,
+            kwargs)
+        request.future.add_done_callback(
+            lambda _: Clock.schedule_once(
+                lambda _: self.__deliver(request, profile, on_result,
+                                         on_error)))
+        return request
+
+    def run_first(self, fn: Callable, *args, **kwargs) -> DbRequest:
+        # Requests submitted afterwards wait until this one has finished,
+        # e.g. the startup migration; if it fails, they fail with its error
+        request = self.submit(fn, *args, **kwargs)
+        self.__gate = request.future
+        return request
+
+    def cancel(self, tag: str) -> None:
+        request = self.__requests.pop(tag, None)
+        if request is not None:
+            request.cancel()
+
+    def is_pending(self, tag: str) -> bool:
+        return tag in self.__requests
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def __run(gate: Future | None, action: str, profile, fn: Callable, args,
+              kwargs):
+        if gate is not None:
+            gate.result()
+        # The request's queries are counted under its tag, or under the
+        # function that submitted it
+        with tracker.action(action), profiler.db_phase(profile):
+            return fn(*args, **kwargs)
+
+    def __deliver(self, request: DbRequest, profile, on_result,
+                  on_error) -> None:
+        # Result handlers count towards the screen that asked for the data
+        with profiler.delivery(profile):
+            self.__deliver_result(request, on_result, on_error)
+
+    def __deliver_result(self, request: DbRequest, on_result,
+                         on_error) -> None:
+        if request.tag is not None and \
+                self.__requests.get(request.tag) is request:
+            del self.__requests[request.tag]
+        if request.cancelled:
+            return
+        error = request.future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                logger.error("Database call failed", exc_info=error)
+        elif on_result is not None:
+            on_result(request.future.result())
@@ -0,0 +1,29 @@
+from kivy.event import EventDispatcher
+
+
+class PizzeriaEvents(EventDispatcher):
+    # Lets cached screens patch the affected rows instead of rebuilding.
+    # The order events come from OrderFeed, for this terminal's changes and
+    # other terminals' alike; on_orders_reset means there were too many to
+    # patch and the order lists should reload.
+    __events__ = ('on_order_placed', 'on_order_status_changed',
+                  'on_order_deleted', 'on_orders_reset',
+                  'on_menu_item_saved', 'on_menu_item_deleted')
+
+    def on_order_placed(self, order):
+        pass
+
+    def on_order_status_changed(self, order_id, status):
+        pass
+
+    def on_order_deleted(self, order_id):
+        pass
+
+    def on_orders_reset(self):
+        pass
+
+    def on_menu_item_saved(self, item):
+        pass
+
+    def on_menu_item_deleted(self, menu_item_id):
+        pass
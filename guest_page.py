@@ -0,0 +1,497 @@
+from collections import Counter
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import (MDRaisedButton, MDFlatButton,
+                               MDRectangleFlatButton)
+from kivymd.uix.card import MDCard
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.label import MDLabel
+from kivymd.uix.textfield import MDTextField
+from sqlalchemy.exc import IntegrityError
+
+import services
+from api_codec import ApiError
+from services import db_executor, events, guest_session, order_feed
+from models import User
+from render_profile import profiled_screens
+from screens import show_screen, find_row_index, menu_item_texture
+from widgets import (build_recycle_view, loading_label, GuestOrderCard,
+                     GuestMenuItemCard)
+
+
+HISTORY_PAGE_SIZE = 20
+# Seconds of no typing before the menu search runs
+SEARCH_DELAY = 0.25
+
+
+@profiled_screens
+class GuestPage:
+    def __init__(self, screen_manager, show_admin_login_screen,
+                 admin_login_page_entrance, show_login_screen):
+        self.screen_manager = screen_manager
+        self.show_login_screen = show_login_screen
+        self.show_admin_login_screen = show_admin_login_screen
+        self.admin_login_page_entrance = admin_login_page_entrance
+        self.dialog = None
+        self.selected_items = []
+        self.selected_items_name = []
+        self.total_price = 0
+        self.menu_view = None
+        self.menu_loading = None
+        self.search_text = ''
+        self.search_trigger = Clock.create_trigger(self.search_menu,
+                                                   SEARCH_DELAY)
+        self.history_view = None
+        self.history_loading = None
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.stats_labels = []
+        events.bind(on_order_placed=self.on_order_placed,
+                    on_order_status_changed=self.on_order_status_changed,
+                    on_order_deleted=self.on_order_deleted,
+                    on_orders_reset=self.on_orders_reset,
+                    on_menu_item_saved=self.on_menu_item_saved,
+                    on_menu_item_deleted=self.on_menu_item_deleted)
+
+    def add_order(self, menu_items: list[int]):
+        db_executor.submit(services.user_manager.place_order,
+                           guest_session.user.id,
+                           Counter(menu_items),
+                           on_result=lambda _: order_feed.poll(),
+                           on_error=self.on_order_failed)
+
+    def on_order_failed(self, error):
+        dialog = MDDialog(title="Error",
+                          text=f"The order could not be placed: {error}",
+                          size_hint=(0.7, 0.3),
+                          auto_dismiss=True,
+                          buttons=[MDFlatButton(text="OK",
+                                                on_release=self.dismiss_dialog)])
+        dialog.open()
+        self.dialog = dialog
+
+    def show_guest_screen(self, *_):
+        show_screen(self.screen_manager, 'guest', self.build_guest_screen)
+
+    def build_guest_screen(self, guest_screen):
+        self.selected_items = []
+        self.selected_items_name = []
+        self.total_price = 0
+
+        self.menu_view = build_recycle_view(GuestMenuItemCard, dp(200))
+        self.menu_loading = loading_label()
+        search_field = MDTextField(hint_text="Search the menu",
+                                   size_hint_y=None, height=dp(48))
+        search_field.bind(text=self.on_search_text)
+        self.search_text = ''
+        self.search_menu()
+
+        buttons_layout = MDBoxLayout(orientation='horizontal', padding=dp(12),
+                                     spacing=dp(12))
+        order_button = MDRaisedButton(text="Place Order",
+                                      pos_hint={'center_x': 0.5},
+                                      on_release=self.place_order)
+        back_button = MDRaisedButton(text="Admin Login",
+                                     pos_hint={'center_x': 0.5},
+                                     on_release=self.admin_login_page_entrance)
+
+        edit_profile_button = MDRaisedButton(text="Edit Profile",
+                                             pos_hint={'center_x': 0.5},
+                                             on_release=self.edit_credentials_page)
+
+        logout_button = MDRaisedButton(text="Logout",
+                                       pos_hint={'center_x': 0.5},
+                                       on_release=self.logout)
+        o_history_button = MDRaisedButton(text="Orders history",
+                                          pos_hint={'center_x': 0.5},
+                                          on_release=self.show_order_history_screen)
+        stats_button = MDRaisedButton(text="Stats",
+                                      pos_hint={'center_x': 0.5},
+                                      on_release=self.show_user_stats_screen)
+        buttons_layout.add_widget(order_button)
+        buttons_layout.add_widget(back_button)
+        buttons_layout.add_widget(edit_profile_button)
+        buttons_layout.add_widget(logout_button)
+        buttons_layout.add_widget(o_history_button)
+        buttons_layout.add_widget(stats_button)
+
+        guest_layout = MDBoxLayout(orientation='vertical')
+        guest_layout.add_widget(search_field)
+        guest_layout.add_widget(self.menu_view)
+        guest_screen.add_widget(guest_layout)
+        guest_screen.add_widget(buttons_layout)
+        guest_screen.add_widget(self.menu_loading)
+
+    def on_search_text(self, _, text):
+        # Runs once typing pauses; a search still in flight is superseded
+        # through the shared tag
+        self.search_text = text
+        self.search_trigger.cancel()
+        self.search_trigger()
+
+    def search_menu(self, *_):
+        self.menu_loading.opacity = 1
+        db_executor.submit(services.user_manager.search_menu_items,
+                           self.search_text, tag='guest_menu',
+                           on_result=self.on_menu_items)
+
+    def on_menu_items(self, items):
+        self.menu_loading.opacity = 0
+        # Items picked before the search changed stay in the order
+        self.menu_view.data = [
+            self.menu_item_data(item, item.id in self.selected_items)
+            for item in items]
+
+    def menu_item_data(self, item, selected: bool = False) -> dict:
+        return {'texture_loader': menu_item_texture,
+                'select_handler': self.on_item_selected,
+                'selected': selected,
+                'row': item}
+
+    def clear_selection(self):
+        self.selected_items = []
+        self.selected_items_name = []
+        self.total_price = 0
+        if self.menu_view is None:
+            return
+        for index, entry in enumerate(self.menu_view.data):
+            if entry['selected']:
+                self.menu_view.data[index] = self.menu_item_data(entry['row'])
+
+    def on_menu_item_saved(self, _, item):
+        if self.menu_view is None:
+            return
+        index = find_row_index(self.menu_view.data, item.id)
+        if index is None and self.search_text:
+            # It may or may not match now
+            self.search_menu()
+            return
+        if index is None:
+            self.menu_view.data.append(self.menu_item_data(item))
+            return
+        entry = self.menu_view.data[index]
+        if entry['selected']:
+            self.total_price += item.price - entry['row'].price
+            position = self.selected_items.index(item.id)
+            self.selected_items_name[position] = item.name
+        self.menu_view.data[index] = self.menu_item_data(item,
+                                                         entry['selected'])
+
+    def on_menu_item_deleted(self, _, menu_item_id):
+        if self.menu_view is None:
+            return
+        index = find_row_index(self.menu_view.data, menu_item_id)
+        if index is None:
+            return
+        entry = self.menu_view.data.pop(index)
+        if entry['selected']:
+            self.on_item_selected(None, entry['row'], False)
+
+    def show_user_stats_screen(self, *_):
+        show_screen(self.screen_manager, 'guest_stats',
+                    self.build_user_stats_screen)
+        self.refresh_user_stats()
+
+    def build_user_stats_screen(self, stats_screen):
+        card = MDCard(
+            size_hint_y=None,
+            height=dp(300),
+            padding=dp(16),
+            spacing=dp(8),
+            pos_hint={"top": 1},
+            elevation=dp(4),  # Add some elevation for depth
+            md_bg_color="#E0E0E0"
+            # Use theme color for better integration
+        )
+
+        self.stats_labels = [
+            MDLabel(halign='center', font_style='H6'),
+            MDLabel(halign='center'),
+            MDLabel(halign='center'),
+            MDLabel(halign='center'),
+        ]
+
+        for label in self.stats_labels:
+            card.add_widget(label)
+
+        back_button = MDRectangleFlatButton(
+            text="Back",
+            size_hint=(None, None),
+            size=(dp(150), dp(50)),
+            on_release=self.show_guest_screen  # Use built-in back navigation
+        )
+
+        buttons_layout = MDBoxLayout(orientation='horizontal',
+                                     padding=dp(12),
+                                     spacing=dp(12))
+
+        buttons_layout.add_widget(back_button)
+
+        stats_screen.add_widget(card)
+        stats_screen.add_widget(buttons_layout)
+
+    def refresh_user_stats(self):
+        user_id = guest_session.user.id
+        for label in self.stats_labels:
+            label.text = "Loading..."
+
+        db_executor.submit(services.user_manager.get_user_stats, user_id,
+                           tag='guest_stats', on_result=self.show_stats)
+
+    def show_stats(self, stats):
+        texts = (
+            f"Total Orders: {stats.order_count}",
+            # Format currency with 2 decimal places
+            f"Total Spent: ${stats.total_spent:.2f}",
+            f"Avg. Spent: ${stats.avg_spent:.2f}",
+            f"Most Ordered: {stats.favourite_item}",
+        )
+        for label, text in zip(self.stats_labels, texts):
+            label.text = text
+
+    def show_order_history_screen(self, *_):
+        show_screen(self.screen_manager, 'guest_orders',
+                    self.build_order_history_screen)
+
+    def build_order_history_screen(self, orders_screen):
+        # Create a recycled list of order cards
+        self.history_view = build_recycle_view(GuestOrderCard, dp(250),
+                                               dp(700))
+        self.history_view.bind(scroll_y=self.on_history_scroll)
+        self.history_loading = loading_label()
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.load_history_page()
+
+        buttons_layout = MDBoxLayout(orientation='horizontal',
+                                     padding=dp(12),
+                                     spacing=dp(12))
+        back_button = MDRaisedButton(text="Admin Login",
+                                     pos_hint={'center_x': 0.5},
+                                     on_release=self.admin_login_page_entrance)
+        o_button = MDRaisedButton(text="Back",
+                                  pos_hint={'center_x': 0.5},
+                                  on_release=self.show_guest_screen)
+
+        edit_profile_button = MDRaisedButton(text="Edit Profile",
+                                             pos_hint={'center_x': 0.5},
+                                             on_release=self.edit_credentials_page)
+
+        logout_button = MDRaisedButton(text="Logout",
+                                       pos_hint={'center_x': 0.5},
+                                       on_release=self.logout)
+        buttons_layout.add_widget(o_button)
+        buttons_layout.add_widget(back_button)
+        buttons_layout.add_widget(edit_profile_button)
+        buttons_layout.add_widget(logout_button)
+        # Add scrollable view and footer buttons to the screen
+        orders_screen.add_widget(self.history_view)
+        orders_screen.add_widget(buttons_layout)
+        orders_screen.add_widget(self.history_loading)
+
+    def load_history_page(self):
+        if self.history_exhausted or db_executor.is_pending('guest_history'):
+            return
+        self.history_loading.opacity = 1
+        db_executor.submit(services.user_manager.get_order_history_page,
+                           guest_session.user.id, after=self.history_cursor,
+                           limit=HISTORY_PAGE_SIZE, tag='guest_history',
+                           on_result=self.on_history_page)
+
+    def on_history_page(self, orders):
+        self.history_loading.opacity = 0
+        if len(orders) < HISTORY_PAGE_SIZE:
+            self.history_exhausted = True
+        if orders:
+            self.history_cursor = (orders[-1].created_at, orders[-1].id)
+        self.history_view.data.extend({'row': order} for order in orders)
+
+    def on_history_scroll(self, scroll_view, scroll_y):
+        # scroll_y reaches 0 at the bottom of the list
+        if scroll_y <= 0.05:
+            self.load_history_page()
+
+    def on_order_placed(self, _, order):
+        # The feed reports every guest's orders; skip those already loaded
+        if self.history_view is None or \
+                order.user_id != guest_session.user.id or \
+                find_row_index(self.history_view.data, order.id) is not None:
+            return
+        self.history_view.data.insert(0, {'row': order})
+
+    def on_order_status_changed(self, _, order_id, status):
+        if self.history_view is None:
+            return
+        index = find_row_index(self.history_view.data, order_id)
+        if index is not None:
+            row = self.history_view.data[index]['row']
+            self.history_view.data[index] = {
+                'row': row._replace(status=status)}
+
+    def on_order_deleted(self, _, order_id):
+        if self.history_view is None:
+            return
+        index = find_row_index(self.history_view.data, order_id)
+        if index is not None:
+            self.history_view.data.pop(index)
+
+    def on_orders_reset(self, _):
+        if self.history_view is None:
+            return
+        db_executor.cancel('guest_history')
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.history_view.data = []
+        self.history_view.scroll_y = 1
+        self.load_history_page()
+
+    def logout(self, *_):
+        if guest_session.user is not None:
+            db_executor.submit(services.user_manager.delete_user, guest_session.user.id)
+            guest_session.sign_out()
+            # Drop the screens that belong to this guest
+            for name in ('guest_orders', 'guest_stats', 'edit_credentials'):
+                if self.screen_manager.has_screen(name):
+                    self.screen_manager.remove_widget(
+                        self.screen_manager.get_screen(name))
+            db_executor.cancel('guest_history')
+            self.history_view = None
+            self.clear_selection()
+            self.show_login_screen()
+
+    def edit_credentials_page(self, *_):
+        show_screen(self.screen_manager, 'edit_credentials',
+                    self.build_edit_credentials_page)
+
+    def build_edit_credentials_page(self, login_screen):
+        user = guest_session.user
+
+        layout = MDBoxLayout(orientation='vertical', padding=dp(48),
+                             spacing=dp(24))
+        first_name_field = MDTextField(text=user.first_name,
+                                       hint_text="First Name", required=True)
+        last_name_field = MDTextField(text=user.last_name,
+                                      hint_text="Last Name", required=True)
+        phone_num_field = MDTextField(text=user.phone_number,
+                                      hint_text="Phone Number", required=True)
+
+        save_changes_button = MDRaisedButton(text="Save",
+                                             on_release=lambda
+                                             x: self.save_changes(
+                                                 first_name_field.text,
+                                                 last_name_field.text,
+                                                 phone_num_field.text))
+
+        guest_screen_button = MDRaisedButton(text="Main page",
+                                             on_release=self.show_guest_screen)
+
+        layout.add_widget(first_name_field)
+        layout.add_widget(last_name_field)
+        layout.add_widget(phone_num_field)
+        layout.add_widget(save_changes_button)
+        layout.add_widget(guest_screen_button)
+        login_screen.add_widget(layout)
+
+    def save_changes(self, first_name, last_name, phone_num):
+        if not first_name or not last_name or not phone_num:
+            dialog = MDDialog(title="Invalid Credentials",
+                              text="Please enter valid credentials.",
+                              size_hint=(0.7, 0.3),
+                              auto_dismiss=True,
+                              buttons=[MDFlatButton(text="OK",
+                                                    on_release=self.dismiss_dialog)])
+            dialog.open()
+            self.dialog = dialog
+        else:
+            old_phone_number = guest_session.user.phone_number
+            user = User(first_name=first_name, last_name=last_name,
+                        phone_number=phone_num)
+            db_executor.submit(services.user_manager.update_user, old_phone_number,
+                               user, tag='edit_credentials',
+                               on_result=self.on_credentials_saved,
+                               on_error=self.on_credentials_failed)
+
+    def on_credentials_saved(self, new_user):
+        if not new_user:
+            dialog = MDDialog(title="Invalid User",
+                              text="User with current credentials doesn't exist.",
+                              size_hint=(0.7, 0.3),
+                              auto_dismiss=True,
+                              buttons=[MDFlatButton(text="OK",
+                                                    on_release=self.dismiss_dialog)])
+            dialog.open()
+            self.dialog = dialog
+        else:
+            guest_session.sign_in(new_user)
+
+    def on_credentials_failed(self, error):
+        # Phone numbers are unique: the local backend raises IntegrityError
+        # for a taken one, the API server answers 409 Conflict
+        if (isinstance(error, IntegrityError)
+                or isinstance(error, ApiError) and error.status == 409):
+            title = "Phone Number Taken"
+            text = "This phone number is already registered."
+        else:
+            title = "Error"
+            text = f"The changes could not be saved: {error}"
+        dialog = MDDialog(title=title,
+                          text=text,
+                          size_hint=(0.7, 0.3),
+                          auto_dismiss=True,
+                          buttons=[MDFlatButton(text="OK",
+                                                on_release=self.dismiss_dialog)])
+        dialog.open()
+        self.dialog = dialog
+
+    def on_item_selected(self, index, item, value):
+        # Recycled cards read their checkbox state back from the data
+        if index is not None:
+            self.menu_view.data[index]['selected'] = value
+        if value:
+            self.selected_items.append(item.id)
+            self.selected_items_name.append(item.name)
+            self.total_price += item.price
+        else:
+            self.selected_items.remove(item.id)
+            self.selected_items_name.remove(item.name)
+            self.total_price -= item.price
+
+    def place_order(self, instance):
+        if not self.selected_items:
+            dialog = MDDialog(title="Error",
+                              text="Please select at least one item to place an order.",
+                              size_hint=(0.7, 0.3),
+                              auto_dismiss=True,
+                              buttons=[MDFlatButton(text="OK",
+                                                    on_release=self.dismiss_dialog)])
+            dialog.open()
+            self.dialog = dialog
+            return
+
+        # Store the order and display confirmation dialog
+        dialog = MDDialog(title="Order Confirmation",
+                          text=f"Are you sure you want to place order? "
+                               f"Selected items: {self.selected_items_name}, "
+                               f"Total price: {self.total_price}",
+                          size_hint=(0.7, 0.3),
+                          auto_dismiss=False,
+                          buttons=[MDFlatButton(text="Place order",
+                                                on_release=self.add_order_and_dismiss),
+                                   MDFlatButton(text="Cancel",
+                                                on_release=self.dismiss_dialog)])
+        dialog.open()
+        self.dialog = dialog
+
+    def add_order_and_dismiss(self, *_):
+        self.add_order(self.selected_items)
+        self.dismiss_dialog(self)
+        self.clear_selection()
+
+    def back_to_login(self, instance):
+        self.show_admin_login_screen()
+
+    def dismiss_dialog(self, instance):
+        if self.dialog is not None:
+            self.dialog.dismiss()
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_FORMAT_VERSION = 1
+
+
+class SessionUser(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+    phone_number: str
+
+
+class GuestSession:
+    # The signed-in guest, read from disk once and then served from memory.
+    # Changes are written behind, in order, on a single worker thread as
+    # JSON, through a temporary file and os.replace, so a crash mid-write
+    # leaves the previous file intact.
+
+    def __init__(self, path: str, legacy_path: str | None = None):
+        self.path = path
+        self.__writer = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix='session')
+        self.user = self.__load()
+        if self.user is None and legacy_path is not None:
+            self.user = self.__load_legacy(legacy_path)
+
+    def sign_in(self, user) -> None:
+        # Accepts a User or anything else with the same four attributes
+        self.user = SessionUser(int(user.id), user.first_name, user.last_name,
+                                user.phone_number)
+        self.__save_later()
+
+    def sign_out(self) -> None:
+        self.user = None
+        self.__save_later()
+
+    def flush(self) -> None:
+        # Waits for pending writes; call before the process exits
+        self.__writer.shutdown(wait=True)
+
+    def __load(self) -> SessionUser | None:
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable session file %s", self.path)
+            return None
+        try:
+            user = data['user']
+            if not user:
+                return None
+            user = SessionUser(**user)
+            return user._replace(id=int(user.id))
+        except (KeyError, TypeError, ValueError):
+            # Valid JSON, but not a session this code wrote
+            logger.exception("Ignoring malformed session file %s", self.path)
+            return None
+
+    def __load_legacy(self, legacy_path: str) -> SessionUser | None:
+        # The old comma-joined "id,first,last,phone" file; converted once
+        if not os.path.exists(legacy_path):
+            return None
+        try:
+            with open(legacy_path, encoding='utf-8') as file:
+                data = file.read().split(',')
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable session file %s",
+                             legacy_path)
+            return None
+        user = None
+        try:
+            if len(data) == 4:
+                user = SessionUser(int(data[0]), *data[1:])
+        except ValueError:
+            # Converted as signed out, so it isn't reported on every start
+            logger.exception("Ignoring malformed session file %s",
+                             legacy_path)
+        self.__save(user)
+        os.remove(legacy_path)
+        return user
+
+    def __save_later(self) -> None:
+        self.__writer.submit(self.__save, self.user)
+
+    def __save(self, user: SessionUser | None) -> None:
+        data = {'version': SESSION_FORMAT_VERSION,
+                'user': user._asdict() if user else None}
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import threading
+
+IMAGE_STORE_DIR = os.path.join('assets', 'images')
+
+# Kivy picks an image loader by file extension, so keys keep one
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'BM', '.bmp'),
+)
+
+
+def guess_extension(data: bytes) -> str:
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    return '.jpg'
+
+
+class ImageStore:
+
+    def __init__(self, root: str = IMAGE_STORE_DIR):
+        self.__root = root
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest() + guess_extension(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        self.__write(path, data)
+        return key
+
+    def put_file(self, file_path: str) -> str:
+        with open(file_path, 'rb') as f:
+            return self.put(f.read())
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.__root, key[:2], key)
+
+    def variant_path(self, key: str, variant: str) -> str:
+        image_hash, _ = os.path.splitext(key)
+        return os.path.join(self.__root, key[:2],
+                            f'{image_hash}_{variant}.jpg')
+
+    def put_variant(self, key: str, variant: str, data: bytes) -> str:
+        path = self.variant_path(key, variant)
+        self.__write(path, data)
+        return path
+
+    def exists(self, key: str | None) -> bool:
+        return bool(key) and os.path.exists(self.path(key))
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def __write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,291 @@
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from sqlalchemy.exc import OperationalError
+
+from db import PROFILES, create_db_engine
+from managers import AdminManager, UserManager
+from models import ACTIVE_ORDER_STATUSES, OrderStatus
+
+# Rush-hour simulation: kiosk threads place orders through
+# UserManager.place_order while kitchen threads move active orders along
+# through AdminManager.update_order_status, spread over several processes
+# that share one SQLite file. Arrivals are open-loop (Poisson at a fixed
+# rate), so a slow database shows up as growing latency rather than as
+# quietly fewer requests.
+
+# Each kitchen update moves an order one step along
+NEXT_STATUS = {
+    OrderStatus.CREATED: OrderStatus.COOKING,
+    OrderStatus.COOKING: OrderStatus.READY,
+    OrderStatus.READY: OrderStatus.DONE,
+}
+
+# How many active orders a kitchen thread fetches at a time to work through
+KITCHEN_BATCH = 20
+
+
+class LoadConfig(NamedTuple):
+    database: str
+    profile: str = 'production'
+    duration: float = 30.0
+    processes: int = 2
+    kiosks: int = 8  # threads per process
+    cooks: int = 2  # threads per process
+    order_rate: float = 20.0  # orders per second, across all kiosks
+    status_rate: float = 20.0  # status changes per second, across all cooks
+    max_retries: int = 5
+    retry_backoff: float = 0.01  # seconds, doubled on each retry
+    seed: int = 0
+
+
+def is_locked(error: OperationalError) -> bool:
+    return 'database is locked' in str(error.orig)
+
+
+class Recorder:
+    # Per-process counters and latency samples, shared by its threads.
+    # Operations that gave up are sampled apart from those that succeeded,
+    # so a burst of failures can't pass for fast calls or hide slow ones.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.failed_latencies: dict[str, list[float]] = {}
+        self.counts: dict[str, dict[str, int]] = {}
+
+    def count(self, kind: str, key: str) -> None:
+        with self.lock:
+            counts = self.counts.setdefault(
+                kind, {'ok': 0, 'failed': 0, 'lock_errors': 0, 'retries': 0})
+            counts[key] += 1
+
+    def sample(self, kind: str, seconds: float, failed: bool = False) -> None:
+        latencies = self.failed_latencies if failed else self.latencies
+        with self.lock:
+            latencies.setdefault(kind, []).append(seconds * 1000)
+
+
+def call_with_retries(fn: Callable, kind: str, config: LoadConfig,
+                      recorder: Recorder, scheduled: float | None = None):
+    # "database is locked" is retried with exponential backoff on top of the
+    # connection's busy_timeout; anything else fails the operation. With a
+    # scheduled start time the latency up to success or giving up is
+    # sampled too.
+    for attempt in range(config.max_retries + 1):
+        try:
+            result = fn()
+        except OperationalError as error:
+            if not is_locked(error):
+                break
+            recorder.count(kind, 'lock_errors')
+            if attempt == config.max_retries:
+                break
+            recorder.count(kind, 'retries')
+            time.sleep(config.retry_backoff * 2 ** attempt)
+        else:
+            recorder.count(kind, 'ok')
+            if scheduled is not None:
+                recorder.sample(kind, time.perf_counter() - scheduled)
+            return result
+    recorder.count(kind, 'failed')
+    if scheduled is not None:
+        recorder.sample(kind, time.perf_counter() - scheduled, failed=True)
+    return None
+
+
+def paced(rate: float, deadline: float, rng: random.Random):
+    # Yields scheduled start times with exponential gaps until the deadline;
+    # latency is measured from these, so time spent waiting behind a slow
+    # call still counts against the next one
+    scheduled = time.perf_counter()
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled >= deadline:
+            return
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield scheduled
+
+
+def kiosk(user_manager: UserManager, user_ids: list[int],
+          menu_ids: list[int], config: LoadConfig, rate: float,
+          deadline: float, rng: random.Random, recorder: Recorder) -> None:
+    for scheduled in paced(rate, deadline, rng):
+        user_id = rng.choice(user_ids)
+        quantities = {menu_id: rng.randint(1, 2)
+                      for menu_id in rng.sample(menu_ids,
+                                                rng.randint(1, 3))}
+        call_with_retries(
+            lambda: user_manager.place_order(user_id, quantities),
+            'place_order', config, recorder, scheduled)
+
+
+def kitchen(admin_manager: AdminManager, config: LoadConfig, rate: float,
+            deadline: float, rng: random.Random, recorder: Recorder) -> None:
+    queue = []
+    for scheduled in paced(rate, deadline, rng):
+        if not queue:
+            # Picking up work is part of the kitchen's load but not the
+            # operation being measured
+            queue = call_with_retries(
+                lambda: admin_manager.get_orders_page(
+                    statuses=ACTIVE_ORDER_STATUSES, limit=KITCHEN_BATCH),
+                'get_orders_page', config, recorder) or []
+            rng.shuffle(queue)
+            if not queue:
+                continue
+        order = queue.pop()
+        call_with_retries(
+            lambda: admin_manager.update_order_status(
+                order.id, NEXT_STATUS[order.status]),
+            'update_order_status', config, recorder, scheduled)
+
+
+def run_process(config: LoadConfig, index: int, start_at: float) -> dict:
+    # One process: its own engine and pool, config.kiosks + config.cooks
+    # threads, each with a share of the total arrival rates
+    engine = create_db_engine(f"sqlite:///{config.database}", config.profile)
+    user_manager = UserManager(engine)
+    admin_manager = AdminManager(engine)
+    menu_ids = [item.id for item in user_manager.list_menu_items()]
+    user_ids = [user.id for user in admin_manager.get_all_users()]
+    recorder = Recorder()
+    threads = []
+    # Processes start together so the rates overlap as configured
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    deadline = started + config.duration
+    for i in range(config.kiosks):
+        rng = random.Random(f"{config.seed}-{index}-kiosk-{i}")
+        rate = config.order_rate / (config.kiosks * config.processes)
+        threads.append(threading.Thread(target=kiosk, args=(
+            user_manager, user_ids, menu_ids, config, rate, deadline, rng,
+            recorder)))
+    for i in range(config.cooks):
+        rng = random.Random(f"{config.seed}-{index}-cook-{i}")
+        rate = config.status_rate / (config.cooks * config.processes)
+        threads.append(threading.Thread(target=kitchen, args=(
+            admin_manager, config, rate, deadline, rng, recorder)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Past the deadline when the database fell behind the arrival rate
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {'latencies': recorder.latencies,
+            'failed_latencies': recorder.failed_latencies,
+            'counts': recorder.counts, 'elapsed': elapsed}
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, round(fraction * (len(samples) - 1)))]
+
+
+def latency_summary(samples: list[float], prefix: str = '') -> dict:
+    # Empty when there are no samples
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    return {f'{prefix}mean_ms': statistics.fmean(samples),
+            f'{prefix}p50_ms': percentile(samples, 0.5),
+            f'{prefix}p90_ms': percentile(samples, 0.9),
+            f'{prefix}p99_ms': percentile(samples, 0.99),
+            f'{prefix}max_ms': samples[-1]}
+
+
+def summarise(results: list[dict]) -> dict:
+    # Latencies are of successful operations; failed_* ones are of
+    # operations that gave up, until they did
+    elapsed = max(result['elapsed'] for result in results)
+    summary = {}
+    kinds = {kind for result in results for kind in result['counts']}
+    for kind in sorted(kinds):
+        counts = {'ok': 0, 'failed': 0, 'lock_errors': 0, 'retries': 0}
+        samples = []
+        failed_samples = []
+        for result in results:
+            for key, value in result['counts'].get(kind, {}).items():
+                counts[key] += value
+            samples.extend(result['latencies'].get(kind, ()))
+            failed_samples.extend(result['failed_latencies'].get(kind, ()))
+        summary[kind] = {**counts, 'throughput_per_s': counts['ok'] / elapsed,
+                         **latency_summary(samples),
+                         **latency_summary(failed_samples, 'failed_')}
+    return summary
+
+
+def prepare_database(config: LoadConfig, users: int) -> None:
+    # Creates the schema and a few guests and menu items if the file is new;
+    # an existing database is used as it is
+    from manager_benchmark import seed_database
+
+    if os.path.exists(config.database):
+        return
+    engine = create_db_engine(f"sqlite:///{config.database}", config.profile)
+    seed_database(engine, users, 0, 1, config.seed)
+    engine.dispose()
+
+
+def run_load(config: LoadConfig) -> dict:
+    # Spawned rather than forked so no process inherits another's
+    # connections or threads
+    context = multiprocessing.get_context('spawn')
+    start_at = time.time() + 2.0
+    with context.Pool(config.processes) as pool:
+        pending = [pool.apply_async(run_process, (config, index, start_at))
+                   for index in range(config.processes)]
+        results = [result.get() for result in pending]
+    return {'config': config._asdict(),
+            'elapsed_s': max(result['elapsed'] for result in results),
+            'results': summarise(results)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Place orders and change their status concurrently "
+                    "from several processes against one SQLite file")
+    parser.add_argument('database', help="SQLite file; created and seeded "
+                                         "with guests and a menu if new")
+    parser.add_argument('--profile', choices=tuple(PROFILES),
+                        default='production')
+    parser.add_argument('--duration', type=float, default=30.0,
+                        help="seconds")
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--kiosks', type=int, default=8,
+                        help="order-placing threads per process")
+    parser.add_argument('--cooks', type=int, default=2,
+                        help="status-changing threads per process")
+    parser.add_argument('--order-rate', type=float, default=20.0,
+                        help="orders per second in total")
+    parser.add_argument('--status-rate', type=float, default=20.0,
+                        help="status changes per second in total")
+    parser.add_argument('--max-retries', type=int, default=5)
+    parser.add_argument('--users', type=int, default=500,
+                        help="guests to create in a new database")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="also write the report here")
+    args = parser.parse_args()
+
+    load_config = LoadConfig(
+        database=args.database, profile=args.profile,
+        duration=args.duration, processes=args.processes,
+        kiosks=args.kiosks, cooks=args.cooks, order_rate=args.order_rate,
+        status_rate=args.status_rate, max_retries=args.max_retries,
+        seed=args.seed)
+    prepare_database(load_config, args.users)
+    report = json.dumps(run_load(load_config), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report + '\n')
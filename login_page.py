@@ -0,0 +1,130 @@
+from kivy.metrics import dp
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.dialog import MDDialog
+from kivymd.uix.textfield import MDTextField
+
+import services
+from services import db_executor, guest_session
+from render_profile import profiled_screens
+from screens import show_screen
+
+
+@profiled_screens
+class LoginPage:
+    def __init__(self, screen_manager, admin_username,
+                 admin_password, admin_page_entrance, guest_page_entrance):
+        self.screen_manager = screen_manager
+        self.admin_username = admin_username
+        self.admin_password = admin_password
+        self.admin_page_entrance = admin_page_entrance
+        self.guest_page_entrance = guest_page_entrance
+        self.dialog = None
+
+    def show_login_screen(self, *_):
+        if guest_session.user is not None:
+            self.login_as_guest(self)
+            return
+        show_screen(self.screen_manager, 'login', self.build_login_screen)
+
+    def build_login_screen(self, login_screen):
+        layout = MDBoxLayout(orientation='vertical', padding=dp(48),
+                             spacing=dp(24))
+        first_name_field = MDTextField(hint_text="First Name", required=True)
+        last_name_field = MDTextField(hint_text="Last Name", required=True)
+        phone_number_field = MDTextField(hint_text="Phone Number",
+                                         required=True)
+
+        register_button = MDRaisedButton(text="Register",
+                                         on_release=lambda
+                                         x: self.register_user(
+                                             first_name_field.text,
+                                             last_name_field.text,
+                                             phone_number_field.text))
+        login_as_admin_button = MDRaisedButton(text="Admin Login",
+                                               on_release=self.show_admin_login_screen)
+        layout.add_widget(first_name_field)
+        layout.add_widget(last_name_field)
+        layout.add_widget(phone_number_field)
+        layout.add_widget(register_button)
+        layout.add_widget(login_as_admin_button)
+        login_screen.add_widget(layout)
+
+    def register_user(self, first_name, last_name, phone_num):
+        if not first_name or not last_name or not phone_num:
+            dialog = MDDialog(title="Invalid Credentials",
+                              text="Please enter valid credentials.",
+                              size_hint=(0.7, 0.3),
+                              auto_dismiss=True,
+                              buttons=[MDFlatButton(text="OK",
+                                                    on_release=self.dismiss_dialog)])
+            dialog.open()
+            self.dialog = dialog
+        else:
+            def register():
+                from models import User
+                # Phone numbers are unique, so a known number signs that
+                # guest back in instead of registering them twice
+                existing_user = services.user_manager.get_user(phone_num)
+                if existing_user is not None:
+                    return existing_user
+                services.user_manager.add_user(User(
+                    first_name=first_name, last_name=last_name,
+                    phone_number=str(phone_num)))
+                return services.user_manager.get_user(phone_num)
+
+            db_executor.submit(register, tag='register',
+                               on_result=self.on_registered)
+
+    def on_registered(self, new_user):
+        guest_session.sign_in(new_user)
+        self.login_as_guest(self)
+
+    def show_admin_login_screen(self, *_):
+        show_screen(self.screen_manager, 'admin_login',
+                    self.build_admin_login_screen)
+
+    def build_admin_login_screen(self, login_screen):
+        layout = MDBoxLayout(orientation='vertical', padding=dp(48),
+                             spacing=dp(24))
+        username_field = MDTextField(hint_text="Username", required=True)
+        password_field = MDTextField(hint_text="Password", required=True,
+                                     password=True)
+
+        login_button = MDRaisedButton(text="Login",
+                                      on_release=lambda x: self.login_admin(
+                                          username_field.text,
+                                          password_field.text))
+        guest_button = MDRaisedButton(text="Back to guest screen",
+                                      on_release=self.show_login_screen)
+
+        layout.add_widget(username_field)
+        layout.add_widget(password_field)
+        layout.add_widget(login_button)
+        layout.add_widget(guest_button)
+        login_screen.add_widget(layout)
+
+    def login_admin(self, username, password):
+        db_executor.submit(services.admin_manager.is_valid_credentials, username,
+                           password, tag='admin_login',
+                           on_result=self.on_admin_credentials_checked)
+
+    def on_admin_credentials_checked(self, is_valid):
+        if is_valid:
+            self.admin_page_entrance()
+        else:
+            dialog = MDDialog(title="Invalid Credentials",
+                              text="Please enter valid username and password.",
+                              size_hint=(0.7, 0.3),
+                              auto_dismiss=True,
+                              buttons=[MDFlatButton(text="OK",
+                                                    on_release=self.dismiss_dialog)])
+            dialog.open()
+            self.dialog = dialog
+
+    def login_as_guest(self, instance):
+        self.guest_page_entrance()
+
+    def dismiss_dialog(self, instance):
+        if self.dialog is not None:
+            self.dialog.dismiss()
@@ -0,0 +1,306 @@
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Callable, Iterator
+
+from sqlmodel import SQLModel
+
+from db import create_db_engine
+from managers import AdminManager, UserManager
+from models import Order, OrderStatus
+from transfer import import_menu_items, import_orders, import_users
+
+# Seeds a throwaway SQLite database per scale with synthetic users, menu
+# items and orders, then times the manager methods the screens call. Runs
+# without Kivy; the report is JSON so runs from two commits can be compared
+# with --baseline.
+
+# (name, price) pairs; the menu is small and fixed, like the real one
+MENU = (
+    ("Margherita Pizza", 8.99), ("Pepperoni Pizza", 9.99),
+    ("Vegetarian Pizza", 10.99), ("Supreme Pizza", 11.99),
+    ("Hawaiian Pizza", 10.49), ("Four Cheese Pizza", 11.49),
+    ("BBQ Chicken Pizza", 12.49), ("Garlic Bread", 3.99),
+    ("Caesar Salad", 6.49), ("Lemonade", 2.49),
+)
+
+# Orders placed in the last day are still moving through the kitchen;
+# older ones are finished
+RECENT_STATUSES = (OrderStatus.CREATED, OrderStatus.COOKING,
+                   OrderStatus.READY, OrderStatus.DONE)
+SETTLED_STATUSES = (OrderStatus.DONE,) * 19 + (OrderStatus.CANCELLED,)
+
+# Relative order volume per hour of day, peaking at lunch and dinner
+HOURLY_WEIGHTS = (1, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 8, 12, 10, 6, 5, 6, 9, 14,
+                  15, 11, 7, 4, 2)
+
+DEFAULT_SCALES = ((100, 1_000), (1_000, 10_000), (10_000, 100_000))
+
+
+def generate_users(n: int) -> Iterator[dict]:
+    for user_id in range(1, n + 1):
+        yield {'id': user_id, 'first_name': f"Guest{user_id}",
+               'last_name': f"Bench{user_id % 97}",
+               'phone_number': f"+1555{user_id:07d}"}
+
+
+def generate_menu_items() -> Iterator[dict]:
+    for item_id, (name, price) in enumerate(MENU, start=1):
+        yield {'id': item_id, 'name': name, 'price': price,
+               'description': f"Benchmark {name.lower()}",
+               'weight': 245, 'radius': 30, 'image_key': None}
+
+
+def generate_orders(m: int, users: int, months: int, rng: random.Random,
+                    end: datetime) -> Iterator[dict]:
+    # Records in transfer.py's import format, oldest first. Users and menu
+    # items are picked with a long tail: a few regulars and best sellers
+    # account for most orders.
+    start = end - timedelta(days=30 * months)
+    days = (end - start).days
+    user_weights = [1 / rank for rank in range(1, users + 1)]
+    item_weights = [1 / rank for rank in range(1, len(MENU) + 1)]
+    user_ids = rng.choices(range(1, users + 1), user_weights, k=m)
+    created = sorted(
+        start + timedelta(days=rng.randrange(days),
+                          hours=rng.choices(range(24), HOURLY_WEIGHTS)[0],
+                          seconds=rng.randrange(3600))
+        for _ in range(m))
+    for order_id, (user_id, created_at) in enumerate(zip(user_ids, created),
+                                                     start=1):
+        item_ids = set(rng.choices(range(1, len(MENU) + 1), item_weights,
+                                   k=rng.choice((1, 1, 2, 2, 3, 4))))
+        lines = [{'menu_item_id': item_id,
+                  'item_name': MENU[item_id - 1][0],
+                  'quantity': rng.choice((1, 1, 1, 2, 3)),
+                  'unit_price': MENU[item_id - 1][1]}
+                 for item_id in sorted(item_ids)]
+        statuses = (RECENT_STATUSES if end - created_at < timedelta(days=1)
+                    else SETTLED_STATUSES)
+        yield {'id': order_id, 'created_at': created_at.isoformat(),
+               'status': rng.choice(statuses).name,
+               'total_price': round(sum(line['unit_price'] * line['quantity']
+                                        for line in lines), 2),
+               'user_id': user_id, 'lines': lines}
+
+
+def seed_database(engine, users: int, orders: int, months: int,
+                  seed: int) -> None:
+    rng = random.Random(seed)
+    SQLModel.metadata.create_all(engine)
+    import_users(engine, generate_users(users))
+    import_menu_items(engine, generate_menu_items())
+    import_orders(engine, generate_orders(orders, users, months, rng,
+                                          datetime.utcnow()))
+
+
+def manager_cases(admin_manager: AdminManager, user_manager: UserManager,
+                  users: int, orders: int,
+                  rng: random.Random) -> dict[str, Callable[[], object]]:
+    # One entry per manager method; each call picks fresh ids so repeats
+    # don't just hit SQLite's page cache for one row. The full-table reads
+    # are only timed at scales where they finish in reasonable time.
+    def user_id():
+        # Skewed like the data, so busy guests are looked up more often
+        return min(int(rng.paretovariate(1.2)), users)
+
+    order_ids = count(orders + 1)
+    # What a terminal polling every second would typically find
+    recent_changes = max(0, admin_manager.get_order_change_position() - 20)
+    menu_ids = range(1, len(MENU) + 1)
+    end = datetime.utcnow()
+    cases = {
+        'AdminManager.get_dashboard': admin_manager.get_dashboard,
+        'AdminManager.count_orders_by_status':
+            admin_manager.count_orders_by_status,
+        'AdminManager.get_total_number_of_orders':
+            admin_manager.get_total_number_of_orders,
+        'AdminManager.get_total_revenue': admin_manager.get_total_revenue,
+        'AdminManager.get_avg_order_price': admin_manager.get_avg_order_price,
+        'AdminManager.get_avg_order_size': admin_manager.get_avg_order_size,
+        'AdminManager.get_orders_page': admin_manager.get_orders_page,
+        'AdminManager.get_orders_page[active]':
+            lambda: admin_manager.get_orders_page(
+                statuses=(OrderStatus.CREATED, OrderStatus.COOKING,
+                          OrderStatus.READY)),
+        'AdminManager.get_sales_series[day, 30d]':
+            lambda: admin_manager.get_sales_series(end - timedelta(days=30),
+                                                   end, 'day'),
+        'AdminManager.get_sales_series[hour, 48h]':
+            lambda: admin_manager.get_sales_series(end - timedelta(hours=48),
+                                                   end, 'hour'),
+        'AdminManager.get_order_changes[20]':
+            lambda: admin_manager.get_order_changes(recent_changes),
+        'AdminManager.get_order_by_id':
+            lambda: admin_manager.get_order_by_id(rng.randint(1, orders)),
+        'AdminManager.update_order_status':
+            lambda: admin_manager.update_order_status(
+                rng.randint(1, orders), rng.choice(tuple(OrderStatus))),
+        'AdminManager.insert_order':
+            lambda: admin_manager.insert_order(Order(
+                id=next(order_ids), total_price=9.99,
+                status=OrderStatus.CREATED, user_id=user_id())),
+        'UserManager.list_menu_items': user_manager.list_menu_items,
+        'UserManager.search_menu_items':
+            lambda: user_manager.search_menu_items('pizz', max_price=11),
+        'UserManager.get_user_by_id':
+            lambda: user_manager.get_user_by_id(user_id()),
+        'UserManager.get_orders_by_user_id':
+            lambda: user_manager.get_orders_by_user_id(user_id()),
+        'UserManager.get_order_history_page':
+            lambda: user_manager.get_order_history_page(user_id()),
+        'UserManager.get_user_stats':
+            lambda: user_manager.get_user_stats(user_id()),
+        'UserManager.get_total_number_of_orders_by_user_id':
+            lambda: user_manager.get_total_number_of_orders_by_user_id(
+                user_id()),
+        'UserManager.get_total_amount_spent_by_user_id':
+            lambda: user_manager.get_total_amount_spent_by_user_id(
+                user_id()),
+        'UserManager.get_avg_amount_spent_by_user_id':
+            lambda: user_manager.get_avg_amount_spent_by_user_id(user_id()),
+        'UserManager.get_most_ordered_item_by_user_id':
+            lambda: user_manager.get_most_ordered_item_by_user_id(user_id()),
+        'UserManager.place_order':
+            lambda: user_manager.place_order(user_id(), {
+                item_id: rng.randint(1, 2)
+                for item_id in rng.sample(menu_ids, rng.randint(1, 3))}),
+    }
+    if orders <= 10_000:
+        cases['AdminManager.get_all_orders'] = admin_manager.get_all_orders
+        cases['AdminManager.list_orders'] = admin_manager.list_orders
+    return cases
+
+
+def time_case(fn: Callable[[], object], repeat: int,
+              warmup: int = 1) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {'min_ms': samples[0],
+            'median_ms': statistics.median(samples),
+            'p95_ms': samples[min(len(samples) - 1,
+                                  round(0.95 * (len(samples) - 1)))],
+            'max_ms': samples[-1],
+            'repeat': repeat}
+
+
+def benchmark_scale(users: int, orders: int, months: int = 6,
+                    repeat: int = 20, seed: int = 0,
+                    workdir: str | None = None) -> dict:
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        path = os.path.join(tmp, 'benchmark.db')
+        engine = create_db_engine(f"sqlite:///{path}", 'benchmark')
+        started = time.perf_counter()
+        seed_database(engine, users, orders, months, seed)
+        seed_s = time.perf_counter() - started
+        cases = manager_cases(AdminManager(engine), UserManager(engine),
+                              users, orders, random.Random(seed))
+        results = {name: time_case(fn, repeat) for name, fn in cases.items()}
+        # Closing the last connection checkpoints the WAL into the file
+        engine.dispose()
+        size_bytes = os.path.getsize(path)
+    return {'users': users, 'orders': orders, 'months': months,
+            'seed_s': seed_s, 'db_size_bytes': size_bytes,
+            'results': results}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform()}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, months: int = 6, repeat: int = 20,
+                   seed: int = 0, workdir: str | None = None) -> dict:
+    return {'environment': environment(),
+            'scales': [benchmark_scale(users, orders, months, repeat, seed,
+                                       workdir)
+                       for users, orders in scales]}
+
+
+def compare(report: dict, baseline: dict,
+            threshold: float = 1.2) -> list[tuple[str, float]]:
+    # (scale and method, current / baseline median) for every method that
+    # got slower than the threshold at a scale present in both reports
+    before = {(scale['users'], scale['orders']): scale['results']
+              for scale in baseline['scales']}
+    regressions = []
+    for scale in report['scales']:
+        previous = before.get((scale['users'], scale['orders']), {})
+        for name, result in scale['results'].items():
+            if name not in previous or not previous[name]['median_ms']:
+                continue
+            ratio = result['median_ms'] / previous[name]['median_ms']
+            if ratio > threshold:
+                regressions.append(
+                    (f"{scale['users']}x{scale['orders']} {name}", ratio))
+    return regressions
+
+
+def parse_scale(text: str) -> tuple[int, int]:
+    users, orders = text.lower().split('x')
+    return int(users), int(orders)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Time the manager methods against synthetic databases "
+                    "of growing size")
+    parser.add_argument('--scale', action='append', type=parse_scale,
+                        metavar='USERSxORDERS',
+                        help="e.g. 1000x10000; repeat for several scales "
+                             "(default: 100x1000, 1000x10000, 10000x100000)")
+    parser.add_argument('--months', type=int, default=6,
+                        help="spread order timestamps over this many months")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="where the temporary databases go")
+    parser.add_argument('--output', help="write the JSON report here "
+                                         "instead of stdout")
+    parser.add_argument('--baseline',
+                        help="earlier report; exit 1 if any median is more "
+                             "than --threshold times slower")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scale or DEFAULT_SCALES, args.months,
+                            args.repeat, args.seed, args.workdir)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for name, ratio in regressions:
+            print(f"Slower: {name} {ratio:.2f}x", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
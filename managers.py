@@ -1,14 +1,86 @@
 import hashlib
+from datetime import datetime, timedelta
 from typing import Sequence
 
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, case, insert, tuple_
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import selectinload
+from sqlalchemy.types import String
+from sqlalchemy.orm import aliased, selectinload
 from sqlmodel import Session, select
 
-from models import MenuItem, User, Order, OrderStatus, Admin, OrderMenuItems
-
-
+from models import (MenuItem, User, Order, OrderStatus, Admin, OrderMenuItems,
+                    OrderSummary, UserSummary, UserItemSummary, HourlySales,
+                    DailySales, OrderChange, MenuItemRow, OrderRow,
+                    OrderChanges, DashboardStats, UserStats, SalesPoint)
+from menu_search import (menu_search, match_query, NAME_WEIGHT,
+                         DESCRIPTION_WEIGHT)
+from order_changes import OPERATIONS, RESET
+from query_stats import instrumented
+
+# Unit separator, so menu item names may contain commas
+NAME_SEPARATOR = '\x1f'
+
+# Changes read per poll at most; a reader further behind reloads instead
+ORDER_CHANGES_BATCH = 500
+
+MENU_ITEM_ROW_COLUMNS = (MenuItem.id, MenuItem.name, MenuItem.price,
+                         MenuItem.description, MenuItem.weight,
+                         MenuItem.radius, MenuItem.image_key)
+
+# Line items read from their snapshots, e.g. "Margherita Pizza x2"
+LINE_ITEM_LABEL = case(
+    (OrderMenuItems.quantity > 1,
+     OrderMenuItems.item_name + ' x' + func.cast(OrderMenuItems.quantity,
+                                                 String)),
+    else_=OrderMenuItems.item_name)
+
+
+
+def order_rows_statement(orders=Order):
+    # `orders` may be an alias of a subquery that has already picked the
+    # page, so the lines are only joined and grouped for those orders
+    return (select(orders.id, orders.created_at, orders.status,
+                   orders.total_price, orders.user_id, User.first_name,
+                   User.last_name, User.phone_number,
+                   func.group_concat(LINE_ITEM_LABEL, NAME_SEPARATOR))
+            .select_from(orders)
+            .outerjoin(User, User.id == orders.user_id)
+            .outerjoin(OrderMenuItems, OrderMenuItems.order_id == orders.id)
+            .group_by(orders.id))
+
+
+def orders_page_statement(statuses: Sequence[OrderStatus] | None = None,
+                          after: tuple[datetime, int] | None = None,
+                          limit: int = 50):
+    # The page is picked first, walking ix_order_created_at, or
+    # ix_order_status_created_at for a single status, from `after` with no
+    # sort; only its orders are then joined to their lines, so a page costs
+    # the same however many orders there are or however deep it is
+    page = select(Order)
+    if statuses:
+        page = page.where(Order.status.in_(statuses))
+    if after is not None:
+        page = page.where(tuple_(Order.created_at, Order.id) < after)
+    page = page.order_by(Order.created_at.desc(),
+                         Order.id.desc()).limit(limit).subquery()
+    orders = aliased(Order, page)
+    return order_rows_statement(orders).order_by(orders.created_at.desc(),
+                                                 orders.id.desc())
+
+
+# Granularity -> (rollup table, bucket width)
+SALES_GRANULARITIES = {
+    'hour': (HourlySales, timedelta(hours=1)),
+    'day': (DailySales, timedelta(days=1)),
+}
+
+
+def to_order_row(row) -> OrderRow:
+    names = tuple(row[-1].split(NAME_SEPARATOR)) if row[-1] else ()
+    return OrderRow._make((*row[:-1], names))
+
+
+@instrumented
 class AdminManager:
 
     def __init__(self, db):
@@ -29,16 +101,123 @@ class AdminManager:
                 select(Order).options(selectinload(Order.menu_items),
                                       selectinload(Order.user))).all()
 
+    def list_orders(self) -> list[OrderRow]:
+        with Session(self.__db) as session:
+            statement = order_rows_statement().order_by(
+                Order.created_at.desc(), Order.id.desc())
+            return [to_order_row(row) for row in session.exec(statement)]
+
+    def get_orders_page(self, statuses: Sequence[OrderStatus] | None = None,
+                        after: tuple[datetime, int] | None = None,
+                        limit: int = 50) -> list[OrderRow]:
+        # Newest first; pass (created_at, id) of the last row as `after` to
+        # continue
+        with Session(self.__db) as session:
+            return [to_order_row(row) for row in session.exec(
+                orders_page_statement(statuses, after, limit))]
+
+    def get_order_change_position(self) -> int:
+        # The seq to read changes after, for a reader starting now
+        with Session(self.__db) as session:
+            return session.exec(select(func.max(OrderChange.seq))).one() or 0
+
+    def get_order_changes(self, after: int,
+                          limit: int = ORDER_CHANGES_BATCH) -> OrderChanges:
+        # A range scan of the log's rowid, then primary key lookups for the
+        # orders it names, so the cost follows the number of changes rather
+        # than the number of orders
+        with Session(self.__db) as session:
+            log = session.exec(
+                select(OrderChange.seq, OrderChange.order_id,
+                       OrderChange.operation)
+                .where(OrderChange.seq > after)
+                .order_by(OrderChange.seq).limit(limit + 1)).all()
+            if not log:
+                return OrderChanges(after)
+            # seqs are consecutive, so a gap means the rows were pruned
+            if (len(log) > limit or log[0].seq != after + 1
+                    or any(row.operation == RESET for row in log)):
+                position = session.exec(
+                    select(func.max(OrderChange.seq))).one()
+                return OrderChanges(position, complete=False)
+
+            changed = {operation: set() for operation in OPERATIONS}
+            for _, order_id, operation in log:
+                changed[operation].add(order_id)
+            # Orders placed and deleted within the batch were never shown
+            placed = changed['insert'] - changed['delete']
+            deleted = changed['delete'] - changed['insert']
+            updated = changed['update'] - placed - deleted
+
+            placed_rows = ()
+            if placed:
+                # Oldest first, so inserting each at the top of a list
+                # leaves the newest there
+                placed_rows = tuple(to_order_row(row) for row in session.exec(
+                    order_rows_statement().where(Order.id.in_(placed))
+                    .order_by(Order.created_at, Order.id)))
+            status_changes = ()
+            if updated:
+                status_changes = tuple(
+                    (row.id, row.status) for row in session.exec(
+                        select(Order.id, Order.status)
+                        .where(Order.id.in_(updated))))
+        return OrderChanges(log[-1].seq, placed_rows, status_changes,
+                            tuple(deleted))
+
+    def count_orders_by_status(self) -> dict[OrderStatus, int]:
+        return self.get_dashboard().status_counts
+
+    def get_dashboard(self) -> DashboardStats:
+        # Reads the trigger-maintained summary, one short row per status
+        with Session(self.__db) as session:
+            rows = session.exec(select(OrderSummary)).all()
+        status_counts = dict.fromkeys(OrderStatus, 0)
+        status_counts.update((row.status, row.order_count) for row in rows)
+        return DashboardStats(
+            order_count=sum(row.order_count for row in rows),
+            revenue=round(sum(row.revenue for row in rows), 2),
+            item_count=sum(row.item_count for row in rows),
+            status_counts=status_counts)
+
     def get_order_by_id(self, order_id: int) -> Order:
         with Session(self.__db) as session:
             statement = select(Order).where(Order.id == order_id)
             return session.exec(statement).one()
 
+    def get_sales_series(self, start: datetime, end: datetime,
+                         granularity: str = 'day',
+                         menu_item_id: int | None = None) -> list[SalesPoint]:
+        # One point per bucket in [start, end), empty buckets included, read
+        # from the rollups so raw orders are never scanned. Without a menu
+        # item the points are totals across the menu.
+        if granularity not in SALES_GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity!r}, expected "
+                             f"one of {', '.join(SALES_GRANULARITIES)}")
+        rollup, width = SALES_GRANULARITIES[granularity]
+        if granularity == 'day':
+            start = start.replace(hour=0)
+        start = start.replace(minute=0, second=0, microsecond=0)
+        statement = select(rollup.bucket, rollup.order_count, rollup.revenue,
+                           rollup.item_count).where(
+            rollup.menu_item_id == (menu_item_id or 0),
+            rollup.bucket >= start, rollup.bucket < end)
+        with Session(self.__db) as session:
+            rows = {row[0]: row for row in session.exec(statement)}
+        series = []
+        bucket = start
+        while bucket < end:
+            row = rows.get(bucket)
+            series.append(SalesPoint(bucket, row[1], round(row[2], 2), row[3])
+                          if row else SalesPoint(bucket, 0, 0.0, 0))
+            bucket += width
+        return series
+
     def insert_menu_item(self, menu_item: MenuItem) -> None:
         with Session(self.__db) as session:
             session.add(menu_item)
             session.commit()
-            # session.refresh(menu_item)
+            session.refresh(menu_item)
 
     def delete_menu_item(self, menu_item: MenuItem) -> None:
         with Session(self.__db) as session:
@@ -100,11 +279,11 @@ class AdminManager:
             return session.exec(statement).one() or 0.0
 
     def get_avg_order_size(self) -> float:
-        with Session(self.__db) as session:
-            statement = select(func.avg(Order.total_price)).select_from(Order)
-            return session.exec(statement).one() or 0.0
+        # Items per order
+        return self.get_dashboard().avg_order_size
 
 
+@instrumented
 class UserManager:
     def __init__(self, db):
         self.__db = db
@@ -139,11 +318,11 @@ class UserManager:
                 print("USERA NEMA TAKOGO")
                 return None
 
-    def get_user(self, number: int) -> User:
+    def get_user(self, number: int) -> User | None:
         with Session(self.__db) as session:
             return session.exec(select(User)
                                 .where(User.phone_number == number)
-                                .options(selectinload(User.orders))).one()
+                                .options(selectinload(User.orders))).first()
 
     def get_user_by_id(self, id: int) -> User:
         with Session(self.__db) as session:
@@ -155,22 +334,118 @@ class UserManager:
         with Session(self.__db) as session:
             return session.query(MenuItem).all()
 
+    def list_menu_items(self) -> list[MenuItemRow]:
+        with Session(self.__db) as session:
+            statement = select(*MENU_ITEM_ROW_COLUMNS).order_by(MenuItem.id)
+            return [MenuItemRow._make(row) for row in session.exec(statement)]
+
     def get_menu_item_by_id(self, menu_item_id: int) -> MenuItem:
         with Session(self.__db) as session:
             statement = select(MenuItem).where(MenuItem.id == menu_item_id)
             return session.exec(statement).one()
 
+    def search_menu_items(self, text: str = '',
+                          min_price: float | None = None,
+                          max_price: float | None = None,
+                          min_weight: int | None = None,
+                          max_weight: int | None = None,
+                          min_radius: int | None = None,
+                          max_radius: int | None = None,
+                          limit: int | None = None) -> list[MenuItemRow]:
+        # Items whose name or description contain every word of `text`
+        # (the last one as a prefix), best matches first, within the given
+        # inclusive ranges. Without text it filters the menu in menu order.
+        statement = select(*MENU_ITEM_ROW_COLUMNS)
+        for field, low, high in ((MenuItem.price, min_price, max_price),
+                                 (MenuItem.weight, min_weight, max_weight),
+                                 (MenuItem.radius, min_radius, max_radius)):
+            if low is not None:
+                statement = statement.where(field >= low)
+            if high is not None:
+                statement = statement.where(field <= high)
+        query = match_query(text)
+        if query is None:
+            statement = statement.order_by(MenuItem.id)
+        else:
+            statement = (statement
+                         .join(menu_search,
+                               menu_search.c.rowid == MenuItem.id)
+                         .where(menu_search.c.menuitem_fts.match(query))
+                         .order_by(func.bm25(menu_search.c.menuitem_fts,
+                                             NAME_WEIGHT, DESCRIPTION_WEIGHT),
+                                   MenuItem.id))
+        statement = statement.limit(limit)
+        with Session(self.__db) as session:
+            return [MenuItemRow._make(row) for row in session.exec(statement)]
+
     def get_order_by_id(self, order_id: int) -> Order:
         with Session(self.__db) as session:
             return session.exec(
                 select(Order).where(Order.id == order_id).options(selectinload(Order.menu_items))).one()
 
+    def place_order(self, user_id: int,
+                    quantities: dict[int, int]) -> OrderRow:
+        # One transaction: a single IN lookup for prices, the order row, one
+        # executemany for the line items, and a total computed from snapshots
+        quantities = {menu_item_id: quantity
+                      for menu_item_id, quantity in quantities.items()
+                      if quantity > 0}
+        if not quantities:
+            raise ValueError("An order needs at least one menu item")
+        with Session(self.__db) as session:
+            items = session.exec(
+                select(MenuItem.id, MenuItem.name, MenuItem.price)
+                .where(MenuItem.id.in_(quantities))).all()
+            missing = set(quantities) - {item.id for item in items}
+            if missing:
+                raise ValueError(f"Unknown menu items: {sorted(missing)}")
+
+            total_price = round(sum(item.price * quantities[item.id]
+                                    for item in items), 2)
+            order = Order(total_price=total_price, status=OrderStatus.CREATED,
+                          user_id=user_id)
+            session.add(order)
+            session.flush()
+            session.execute(insert(OrderMenuItems), [
+                {'order_id': order.id, 'menu_item_id': item.id,
+                 'quantity': quantities[item.id], 'unit_price': item.price,
+                 'item_name': item.name}
+                for item in items])
+            user = session.get(User, user_id)
+            row = OrderRow(order.id, order.created_at, order.status,
+                           order.total_price, user_id,
+                           user and user.first_name, user and user.last_name,
+                           user and user.phone_number,
+                           tuple(item.name if quantities[item.id] == 1
+                                 else f"{item.name} x{quantities[item.id]}"
+                                 for item in items))
+            session.commit()
+            return row
+
     def get_orders_by_user_id(self, user_id: int) -> Sequence[Order]:
         with Session(self.__db) as session:
             return session.exec(
-                select(Order).where(User.id == user_id).order_by(Order.created_at.desc()).options(
+                select(Order).where(Order.user_id == user_id).order_by(Order.created_at.desc()).options(
                     selectinload(Order.menu_items))).all()
 
+    def get_order_history_page(self, user_id: int,
+                               after: tuple[datetime, int] | None = None,
+                               limit: int = 20) -> list[OrderRow]:
+        # The guest's orders, newest first, with their line items; pass
+        # (created_at, id) of the last row as `after` to continue. The page
+        # is picked from the (user_id, created_at) index before any lines
+        # are joined, so a page costs the same however long the history is.
+        page = select(Order).where(Order.user_id == user_id)
+        if after is not None:
+            page = page.where(tuple_(Order.created_at, Order.id) < after)
+        page = page.order_by(Order.created_at.desc(),
+                             Order.id.desc()).limit(limit).subquery()
+        orders = aliased(Order, page)
+        statement = order_rows_statement(orders).order_by(
+            orders.created_at.desc(), orders.id.desc())
+        with Session(self.__db) as session:
+            return [to_order_row(row) for row in session.exec(statement)]
+
     def get_total_number_of_orders_by_user_id(self, user_id: int) -> int:
         with Session(self.__db) as session:
             statement = select(func.count(Order.id)).where(Order.user_id == user_id)
@@ -186,14 +461,27 @@ class UserManager:
             statement = select(func.avg(Order.total_price)).where(Order.user_id == user_id)
             return session.exec(statement).one() or 0.0
 
+    def get_user_stats(self, user_id: int) -> UserStats:
+        # Primary key lookups into the trigger-maintained summaries, so the
+        # cost doesn't grow with the guest's order history
+        with Session(self.__db) as session:
+            summary = session.get(UserSummary, user_id)
+            if summary is None:
+                return UserStats(0, 0.0, None, {})
+            item_counts = dict(session.exec(
+                select(UserItemSummary.item_name, UserItemSummary.quantity)
+                .where(UserItemSummary.user_id == user_id)).all())
+            return UserStats(summary.order_count,
+                             round(summary.total_spent, 2),
+                             summary.favourite_item, item_counts)
+
     def get_most_ordered_item_by_user_id(self, user_id: int) -> str:
         with Session(self.__db) as session:
-            statement = (select(MenuItem.name)
-                         .join(OrderMenuItems, MenuItem.id == OrderMenuItems.menu_item_id)
+            statement = (select(OrderMenuItems.item_name)
                          .join(Order, Order.id == OrderMenuItems.order_id)
                          .filter(Order.user_id == user_id)
-                         .group_by(MenuItem.name)
-                         .order_by(desc(func.count(OrderMenuItems.menu_item_id)))
+                         .group_by(OrderMenuItems.item_name)
+                         .order_by(desc(func.sum(OrderMenuItems.quantity)))
                          .limit(1))
             try:
                 return session.exec(statement).one()
@@ -0,0 +1,97 @@
+import re
+
+from sqlalchemy import column, event, table
+from sqlalchemy.exc import DatabaseError
+from sqlmodel import SQLModel
+
+# Full-text index over menu item names and descriptions. It is an external
+# content table: the text lives in menuitem only, and the triggers below
+# keep the index in step with every insert, edit and delete, whichever code
+# path made it. Prefix indexes make the as-you-type prefix queries cheap.
+MENU_SEARCH_TABLE = '''CREATE VIRTUAL TABLE IF NOT EXISTS menuitem_fts
+    USING fts5(name, description, content='menuitem', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2', prefix='2 3')'''
+
+MENU_SEARCH_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS menuitem_fts_insert
+    AFTER INSERT ON menuitem
+    BEGIN
+        INSERT INTO menuitem_fts (rowid, name, description)
+        VALUES (NEW.id, NEW.name, NEW.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS menuitem_fts_update
+    AFTER UPDATE OF name, description ON menuitem
+    BEGIN
+        INSERT INTO menuitem_fts (menuitem_fts, rowid, name, description)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description);
+        INSERT INTO menuitem_fts (rowid, name, description)
+        VALUES (NEW.id, NEW.name, NEW.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS menuitem_fts_delete
+    AFTER DELETE ON menuitem
+    BEGIN
+        INSERT INTO menuitem_fts (menuitem_fts, rowid, name, description)
+        VALUES ('delete', OLD.id, OLD.name, OLD.description);
+    END''',
+)
+
+# For SQLAlchemy statements; the hidden column named after the table is
+# what MATCH and bm25() take
+menu_search = table('menuitem_fts', column('rowid'), column('menuitem_fts'))
+
+# bm25 weights for name and description: a hit in the name ranks higher
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def match_query(text: str) -> str | None:
+    # Every word must match, the last ones as prefixes while still being
+    # typed, e.g. "pepp piz" -> "pepp"* "piz"*. Words are quoted, so FTS5
+    # syntax in the input is searched for rather than interpreted.
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+
+def rebuild_menu_search(connection) -> None:
+    connection.exec_driver_sql(
+        "INSERT INTO menuitem_fts (menuitem_fts) VALUES ('rebuild')")
+
+
+def install_menu_search(connection) -> None:
+    connection.exec_driver_sql(MENU_SEARCH_TABLE)
+    for trigger in MENU_SEARCH_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    rebuild_menu_search(connection)
+
+
+def verify_menu_search(engine) -> bool:
+    # FTS5 compares the index against menuitem and raises on a mismatch
+    with engine.connect() as connection:
+        try:
+            connection.exec_driver_sql(
+                "INSERT INTO menuitem_fts (menuitem_fts, rank) "
+                "VALUES ('integrity-check', 1)")
+        except DatabaseError:
+            return False
+    return True
+
+
+@event.listens_for(SQLModel.metadata, 'after_create')
+def install_menu_search_on_create(_, connection, **__):
+    install_menu_search(connection)
+
+
+if __name__ == '__main__':
+    import sys
+
+    from services import engine
+
+    if verify_menu_search(engine):
+        sys.exit(0)
+    print("The menu search index is out of step with the menu")
+    if '--repair' in sys.argv:
+        with engine.begin() as connection:
+            rebuild_menu_search(connection)
+        print("Rebuilt the menu search index")
+        sys.exit(0)
+    sys.exit(1)
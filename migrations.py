@@ -0,0 +1,249 @@
+import base64
+import sqlite3
+from functools import partial
+
+from sqlalchemy import inspect
+
+from image_store import ImageStore
+from models import (OrderSummary, UserSummary, UserItemSummary, HourlySales,
+                    DailySales, OrderChange)
+from menu_search import install_menu_search
+from order_changes import ORDER_CHANGE_TRIGGERS, install_order_changes
+from summaries import (install_order_summary, install_user_summary,
+                       install_sales_rollups)
+
+
+def migrate_menu_images(engine, image_store: ImageStore) -> int:
+    # Moves base64 blobs from the legacy menuitem.image column into the
+    # image store and drops the column; returns the number of rows moved
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table('menuitem'):
+            return 0
+        columns = {column['name']
+                   for column in inspector.get_columns('menuitem')}
+        if 'image' not in columns:
+            return 0
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} can't drop the legacy "
+                f"menuitem.image column, 3.35+ is required")
+        if 'image_key' not in columns:
+            connection.exec_driver_sql(
+                'ALTER TABLE menuitem ADD COLUMN image_key VARCHAR')
+
+        ids = connection.exec_driver_sql(
+            'SELECT id FROM menuitem WHERE image IS NOT NULL '
+            "AND image != ''").scalars().all()
+        # One row at a time so only a single blob is held in memory
+        for menu_item_id in ids:
+            image = connection.exec_driver_sql(
+                'SELECT image FROM menuitem WHERE id = ?',
+                (menu_item_id,)).scalar_one()
+            key = image_store.put(base64.b64decode(image))
+            connection.exec_driver_sql(
+                'UPDATE menuitem SET image_key = ? WHERE id = ?',
+                (key, menu_item_id))
+
+        connection.exec_driver_sql('ALTER TABLE menuitem DROP COLUMN image')
+    return len(ids)
+
+
+def migrate_order_lines(engine) -> int:
+    # Adds quantity and price/name snapshots to ordermenuitems and fills them
+    # from the current menu for rows written before they existed
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table('ordermenuitems'):
+            return 0
+        columns = {column['name']
+                   for column in inspector.get_columns('ordermenuitems')}
+        if 'item_name' in columns:
+            return 0
+        connection.exec_driver_sql(
+            'ALTER TABLE ordermenuitems '
+            'ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1')
+        connection.exec_driver_sql(
+            'ALTER TABLE ordermenuitems ADD COLUMN unit_price FLOAT')
+        connection.exec_driver_sql(
+            'ALTER TABLE ordermenuitems ADD COLUMN item_name VARCHAR')
+        return connection.exec_driver_sql(
+            'UPDATE ordermenuitems SET '
+            'unit_price = (SELECT price FROM menuitem '
+            '              WHERE menuitem.id = ordermenuitems.menu_item_id), '
+            'item_name = (SELECT name FROM menuitem '
+            '             WHERE menuitem.id = ordermenuitems.menu_item_id)'
+        ).rowcount
+
+
+# Index DDL as of schema version 3; names match what create_all emits for
+# the index=True fields in models.py
+INDEXES = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_phone_number '
+    'ON user (phone_number)',
+    'CREATE INDEX IF NOT EXISTS ix_admin_name ON admin (name)',
+    'CREATE INDEX IF NOT EXISTS ix_order_user_id ON "order" (user_id)',
+    'CREATE INDEX IF NOT EXISTS ix_order_created_at ON "order" (created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_order_status ON "order" (status)',
+    'CREATE INDEX IF NOT EXISTS ix_ordermenuitems_menu_item_id '
+    'ON ordermenuitems (menu_item_id)',
+)
+
+
+def migrate_indexes(engine) -> int:
+    # Adds the secondary indexes to databases created before they were
+    # declared; returns the number of statements run
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        tables = ('user', 'admin', 'order', 'ordermenuitems')
+        if not all(inspector.has_table(table) for table in tables):
+            return 0
+        duplicates = connection.exec_driver_sql(
+            'SELECT phone_number FROM user GROUP BY phone_number '
+            'HAVING count(*) > 1').scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f"Can't add the unique phone number index, these numbers "
+                f"belong to more than one user: {', '.join(duplicates)}")
+        for statement in INDEXES:
+            connection.exec_driver_sql(statement)
+    return len(INDEXES)
+
+
+def migrate_order_summary(engine) -> int:
+    # Creates the trigger-maintained dashboard summary and fills it from the
+    # existing orders; returns the number of orders summarised
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table('order'):
+            return 0
+        OrderSummary.__table__.create(connection, checkfirst=True)
+        install_order_summary(connection)
+        return connection.exec_driver_sql(
+            'SELECT coalesce(sum(order_count), 0) FROM ordersummary').scalar()
+
+
+def migrate_user_summary(engine) -> int:
+    # Creates the trigger-maintained per-guest stats and fills them from the
+    # existing orders; returns the number of guests summarised
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table('order'):
+            return 0
+        UserSummary.__table__.create(connection, checkfirst=True)
+        UserItemSummary.__table__.create(connection, checkfirst=True)
+        install_user_summary(connection)
+        return connection.exec_driver_sql(
+            'SELECT count(*) FROM usersummary').scalar()
+
+
+def migrate_sales_rollups(engine) -> int:
+    # Creates the trigger-maintained hourly and daily sales rollups and
+    # fills them from the existing orders; returns the number of days
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table('order'):
+            return 0
+        HourlySales.__table__.create(connection, checkfirst=True)
+        DailySales.__table__.create(connection, checkfirst=True)
+        install_sales_rollups(connection)
+        return connection.exec_driver_sql(
+            'SELECT count(*) FROM dailysales WHERE menu_item_id = 0').scalar()
+
+
+def migrate_order_history_index(engine) -> int:
+    # Replaces the user_id index with one on (user_id, created_at), so a
+    # page of a guest's history is an index range scan with no sort;
+    # returns the number of statements run
+    with engine.begin() as connection:
+        if not inspect(connection).has_table('order'):
+            return 0
+        connection.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_order_user_id_created_at '
+            'ON "order" (user_id, created_at)')
+        connection.exec_driver_sql('DROP INDEX IF EXISTS ix_order_user_id')
+    return 2
+
+
+def migrate_order_status_index(engine) -> int:
+    # Replaces the status index with one on (status, created_at), so a page
+    # of the admin's orders filtered to one status needs no sort; returns
+    # the number of statements run
+    with engine.begin() as connection:
+        if not inspect(connection).has_table('order'):
+            return 0
+        connection.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_order_status_created_at '
+            'ON "order" (status, created_at)')
+        connection.exec_driver_sql('DROP INDEX IF EXISTS ix_order_status')
+    return 2
+
+
+def migrate_menu_search(engine) -> int:
+    # Creates the full-text menu index and its triggers and indexes the
+    # existing menu; returns the number of items indexed
+    with engine.begin() as connection:
+        if not inspect(connection).has_table('menuitem'):
+            return 0
+        install_menu_search(connection)
+        return connection.exec_driver_sql(
+            'SELECT count(*) FROM menuitem').scalar()
+
+
+def migrate_order_changes(engine) -> int:
+    # Creates the order change log and its triggers; the log starts empty,
+    # as readers begin from its position when they start. Returns the
+    # number of triggers installed.
+    with engine.begin() as connection:
+        if not inspect(connection).has_table('order'):
+            return 0
+        OrderChange.__table__.create(connection, checkfirst=True)
+        install_order_changes(connection)
+    return len(ORDER_CHANGE_TRIGGERS)
+
+
+def schema_migrations(image_store: ImageStore) -> tuple:
+    # Append only: a database at PRAGMA user_version N has had the first N
+    # steps applied. Each step is idempotent, so a run interrupted between a
+    # step and its version bump is safe to repeat.
+    return (
+        partial(migrate_menu_images, image_store=image_store),
+        migrate_order_lines,
+        migrate_indexes,
+        migrate_order_summary,
+        migrate_user_summary,
+        migrate_sales_rollups,
+        migrate_order_history_index,
+        migrate_menu_search,
+        migrate_order_changes,
+        migrate_order_status_index,
+    )
+
+
+def get_schema_version(engine) -> int:
+    with engine.connect() as connection:
+        return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def migrate(engine, image_store: ImageStore) -> int:
+    # Applies the steps newer than the recorded version and returns the
+    # version the database is at afterwards
+    steps = schema_migrations(image_store)
+    version = get_schema_version(engine)
+    if version > len(steps):
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this "
+            f"application supports ({len(steps)})")
+    for number, step in enumerate(steps[version:], start=version + 1):
+        step(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f'PRAGMA user_version = {number}')
+    return len(steps)
+
+
+if __name__ == '__main__':
+    from services import engine, image_store
+
+    before = get_schema_version(engine)
+    after = migrate(engine, image_store)
+    print(f"Migrated schema from version {before} to {after}")
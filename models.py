@@ -1,6 +1,8 @@
 from datetime import datetime
 from enum import Enum
+from typing import NamedTuple
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -12,17 +14,21 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+ACTIVE_ORDER_STATUSES = (OrderStatus.CREATED, OrderStatus.COOKING,
+                         OrderStatus.READY)
+
+
 class User(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
     first_name: str
     last_name: str
-    phone_number: str
+    phone_number: str = Field(unique=True, index=True)
     orders: list["Order"] = Relationship(back_populates="user", sa_relationship_kwargs={"cascade": "delete"})
 
 
 class Admin(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True)
     password: str
 
 
@@ -30,7 +36,12 @@ class OrderMenuItems(SQLModel, table=True):
     order_id: int | None = Field(default=None, foreign_key="order.id",
                                  primary_key=True)
     menu_item_id: int | None = Field(default=None, foreign_key="menuitem.id",
-                                     primary_key=True)
+                                     primary_key=True, index=True)
+    # Snapshots taken when the order is placed, so later menu edits or
+    # deletions don't rewrite order history
+    quantity: int = Field(default=1)
+    unit_price: float | None = None
+    item_name: str | None = None
 
 
 class MenuItem(SQLModel, table=True):
@@ -38,21 +49,156 @@ class MenuItem(SQLModel, table=True):
     name: str
     price: float
     description: str
-    image: str
+    image_key: str | None = None
     weight: int
     radius: int
+    # View only, so deleting an item leaves the order lines that name it
+    # and their snapshots; the orders own their lines
     orders: list["Order"] = Relationship(back_populates="menu_items",
-                                         link_model=OrderMenuItems)
+                                         link_model=OrderMenuItems,
+                                         sa_relationship_kwargs={
+                                             "viewonly": True})
 
 
 class Order(SQLModel, table=True):
+    # Serve a guest's history and the admin's status-filtered pages newest
+    # first; also cover user_id and status lookups
+    __table_args__ = (Index('ix_order_user_id_created_at', 'user_id',
+                            'created_at'),
+                      Index('ix_order_status_created_at', 'status',
+                            'created_at'))
+
     id: int = Field(default=None, primary_key=True)
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=datetime.utcnow, index=True,
     )
     total_price: float
-    status: OrderStatus = Field()
+    status: OrderStatus
     user_id: int | None = Field(default=None, foreign_key="user.id")
     user: User | None = Relationship(back_populates="orders")
     menu_items: list[MenuItem] = Relationship(back_populates="orders",
                                               link_model=OrderMenuItems)
+
+
+class OrderSummary(SQLModel, table=True):
+    # One row per status, kept current by the triggers in summaries.py
+    status: OrderStatus = Field(primary_key=True)
+    order_count: int = 0
+    revenue: float = 0.0
+    item_count: int = 0
+
+
+class UserSummary(SQLModel, table=True):
+    # One row per guest with orders, kept current by summaries.py triggers
+    user_id: int = Field(primary_key=True)
+    order_count: int = 0
+    total_spent: float = 0.0
+    favourite_item: str | None = None
+
+
+class UserItemSummary(SQLModel, table=True):
+    user_id: int = Field(primary_key=True)
+    item_name: str = Field(primary_key=True)
+    quantity: int = 0
+
+
+class OrderChange(SQLModel, table=True):
+    # Append-only log of order mutations, written by the triggers in
+    # order_changes.py; readers ask for the rows after the last seq they saw
+    seq: int = Field(default=None, primary_key=True)
+    order_id: int
+    operation: str  # one of order_changes.OPERATIONS, or RESET
+
+
+class SalesRollup(SQLModel):
+    # Kept current by the triggers in summaries.py. menu_item_id 0 holds the
+    # totals for the bucket, counting each order once however many items
+    # it has
+    bucket: datetime = Field(primary_key=True)
+    menu_item_id: int = Field(primary_key=True)
+    order_count: int = 0
+    revenue: float = 0.0
+    item_count: int = 0
+
+
+class HourlySales(SalesRollup, table=True):
+    pass
+
+
+class DailySales(SalesRollup, table=True):
+    pass
+
+
+# Read-only rows for list screens: tuple-backed, so no per-instance __dict__
+# and no pydantic validation when they are built from a projection query
+
+class MenuItemRow(NamedTuple):
+    id: int
+    name: str
+    price: float
+    description: str
+    weight: int
+    radius: int
+    image_key: str | None
+
+
+def to_menu_item_row(item: MenuItem) -> MenuItemRow:
+    return MenuItemRow(item.id, item.name, item.price, item.description,
+                       item.weight, item.radius, item.image_key)
+
+
+class OrderRow(NamedTuple):
+    id: int
+    created_at: datetime
+    status: OrderStatus
+    total_price: float
+    user_id: int | None
+    first_name: str | None
+    last_name: str | None
+    phone_number: str | None
+    menu_items: tuple[str, ...]
+
+
+class OrderChanges(NamedTuple):
+    # The net effect of the change log after some seq, up to `seq`: an order
+    # placed and then moved along reads as placed with its current status.
+    # complete is False when the log no longer reaches back that far or
+    # holds more than one batch, and the reader should reload instead.
+    seq: int
+    placed: tuple[OrderRow, ...] = ()
+    status_changes: tuple[tuple[int, OrderStatus], ...] = ()
+    deleted: tuple[int, ...] = ()
+    complete: bool = True
+
+
+class DashboardStats(NamedTuple):
+    order_count: int
+    revenue: float
+    item_count: int
+    status_counts: dict[OrderStatus, int]
+
+    @property
+    def avg_order_price(self) -> float:
+        return self.revenue / self.order_count if self.order_count else 0.0
+
+    @property
+    def avg_order_size(self) -> float:
+        return self.item_count / self.order_count if self.order_count else 0.0
+
+
+class UserStats(NamedTuple):
+    order_count: int
+    total_spent: float
+    favourite_item: str | None
+    item_counts: dict[str, int]
+
+    @property
+    def avg_spent(self) -> float:
+        return self.total_spent / self.order_count if self.order_count else 0.0
+
+
+class SalesPoint(NamedTuple):
+    bucket: datetime
+    order_count: int
+    revenue: float
+    item_count: int
@@ -0,0 +1,104 @@
+import re
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from db import begin_now
+
+# Every insert, status change and delete on "order" appends a row to the
+# orderchange log, whichever code path or process made it, so terminals can
+# pick up each other's changes by reading the log past the last seq they
+# saw. seq is the rowid: SQLite serialises writers, so seqs become visible
+# in the order they were assigned.
+
+OPERATIONS = ('insert', 'update', 'delete')
+
+# Logged once for a bulk write made with the triggers suspended, in place
+# of its per-row changes; readers reload rather than apply it
+RESET = 'reset'
+
+# The log keeps roughly the newest ORDER_CHANGES_KEPT rows. Pruning runs
+# once every ORDER_CHANGES_PRUNE_EVERY changes rather than on each one.
+ORDER_CHANGES_KEPT = 10000
+ORDER_CHANGES_PRUNE_EVERY = 1000
+
+ORDER_CHANGE_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS orderchange_order_insert
+    AFTER INSERT ON "order"
+    BEGIN
+        INSERT INTO orderchange (order_id, operation)
+        VALUES (NEW.id, 'insert');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS orderchange_order_update
+    AFTER UPDATE OF status ON "order"
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        INSERT INTO orderchange (order_id, operation)
+        VALUES (NEW.id, 'update');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS orderchange_order_delete
+    AFTER DELETE ON "order"
+    BEGIN
+        INSERT INTO orderchange (order_id, operation)
+        VALUES (OLD.id, 'delete');
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS orderchange_prune
+    AFTER INSERT ON orderchange
+    WHEN NEW.seq % {ORDER_CHANGES_PRUNE_EVERY} = 0
+    BEGIN
+        DELETE FROM orderchange WHERE seq <= NEW.seq - {ORDER_CHANGES_KEPT};
+    END''',
+)
+
+
+class DataVersion:
+    # PRAGMA data_version moves whenever another connection commits, so
+    # comparing it with the last reading tells whether the log can have
+    # grown without reading any table. It is per connection, so this keeps
+    # one of its own that never writes.
+
+    def __init__(self, engine):
+        self.__engine = engine
+        self.__connection = None
+        self.__lock = threading.Lock()
+
+    def read(self) -> int:
+        with self.__lock:
+            if self.__connection is None:
+                self.__connection = self.__engine.connect()
+            version = self.__connection.exec_driver_sql(
+                'PRAGMA data_version').scalar()
+            # Ends the read transaction, so no snapshot is held in between
+            self.__connection.rollback()
+            return version
+
+
+def install_order_changes(connection) -> None:
+    for trigger in ORDER_CHANGE_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+
+@contextmanager
+def order_changes_suspended(connection):
+    # For bulk writes: every reader would overflow its batch and reload
+    # anyway, so the triggers are dropped for the duration and a single
+    # RESET row is logged instead. Like summaries_suspended, the drops join
+    # the connection's transaction.
+    begin_now(connection)
+    for trigger in ORDER_CHANGE_TRIGGERS:
+        name = re.search(r'IF NOT EXISTS (\w+)', trigger).group(1)
+        connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+    try:
+        yield
+    finally:
+        install_order_changes(connection)
+        connection.exec_driver_sql(
+            f"INSERT INTO orderchange (order_id, operation) "
+            f"VALUES (0, '{RESET}')")
+
+
+@event.listens_for(SQLModel.metadata, 'after_create')
+def install_order_changes_on_create(_, connection, **__):
+    install_order_changes(connection)
@@ -0,0 +1,117 @@
+import logging
+from typing import Callable
+
+from kivy.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls; a poll that finds nothing new costs one PRAGMA
+POLL_INTERVAL = 1.0
+
+
+class OrderFeed:
+    # Replays the order change log (see order_changes.py) as PizzeriaEvents,
+    # so every terminal's screens patch the orders that changed, whichever
+    # terminal changed them. Pages call poll() after their own order writes
+    # rather than dispatching the events themselves, so each change reaches
+    # the screens once and in log order.
+    #
+    # Against a local database the feed checks PRAGMA data_version first and
+    # only reads the log when it has moved; against the API server
+    # (get_engine returns None) the server makes the same check. poll() and
+    # the result handling run on the main thread; one read at a time runs on
+    # the DB worker.
+
+    def __init__(self, executor, events, get_engine: Callable,
+                 get_manager: Callable, interval: float = POLL_INTERVAL):
+        self.__executor = executor
+        self.__events = events
+        self.__get_engine = get_engine
+        self.__get_manager = get_manager
+        self.__interval = interval
+        self.__clock_event = None
+        self.__seq: int | None = None
+        self.__polling = False
+        self.__poll_again = False
+        # Only touched by the read in flight
+        self.__version_source = None
+        self.__data_version = None
+
+    def start(self) -> None:
+        # The first poll records where the log is, so start before the
+        # screens load any orders
+        if self.__clock_event is not None:
+            return
+        self.poll()
+        # A lambda, as Clock can't look up name-mangled bound methods
+        self.__clock_event = Clock.schedule_interval(lambda _: self.poll(),
+                                                     self.__interval)
+
+    def stop(self) -> None:
+        if self.__clock_event is not None:
+            self.__clock_event.cancel()
+            self.__clock_event = None
+
+    def poll(self) -> None:
+        # A call made while a read is in flight runs another one after it,
+        # so a write is never missed for having landed mid-read
+        if self.__polling:
+            self.__poll_again = True
+            return
+        self.__polling = True
+        self.__executor.submit(self.__read, self.__seq, tag='order_feed',
+                               on_result=self.__on_changes,
+                               on_error=self.__on_error)
+
+    def __read(self, seq: int | None):
+        # On the DB worker; returns None when nothing was committed since
+        # the last read
+        from models import OrderChanges
+        from order_changes import DataVersion
+
+        if self.__version_source is None:
+            engine = self.__get_engine()
+            if engine is not None:
+                self.__version_source = DataVersion(engine)
+        data_version = (self.__version_source.read()
+                        if self.__version_source is not None else None)
+        if seq is not None and data_version is not None and \
+                data_version == self.__data_version:
+            return None
+        manager = self.__get_manager()
+        if seq is None:
+            changes = OrderChanges(manager.get_order_change_position())
+        else:
+            changes = manager.get_order_changes(seq)
+        # Only once the read succeeded, so a failed one is retried
+        self.__data_version = data_version
+        return changes
+
+    def __on_changes(self, changes) -> None:
+        self.__polling = False
+        if changes is not None:
+            self.__seq = changes.seq
+            self.__dispatch(changes)
+        self.__poll_pending()
+
+    def __on_error(self, error: BaseException) -> None:
+        self.__polling = False
+        logger.warning("Reading the order change log failed: %s", error)
+        self.__poll_pending()
+
+    def __poll_pending(self) -> None:
+        if self.__poll_again:
+            self.__poll_again = False
+            self.poll()
+
+    def __dispatch(self, changes) -> None:
+        if not changes.complete:
+            self.__events.dispatch('on_orders_reset')
+            return
+        for order in changes.placed:
+            self.__events.dispatch('on_order_placed', order)
+        for order_id, status in changes.status_changes:
+            self.__events.dispatch('on_order_status_changed', order_id,
+                                   status)
+        for order_id in changes.deleted:
+            self.__events.dispatch('on_order_deleted', order_id)
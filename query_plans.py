@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import func, desc, tuple_
+from sqlmodel import select
+
+from managers import order_rows_statement, orders_page_statement
+from models import (User, Admin, Order, OrderMenuItems, OrderChange,
+                    OrderStatus, ACTIVE_ORDER_STATUSES)
+
+# The lookups behind login, registration, order history, the stats screens,
+# the admin order feed and the change log polling, with sample values bound
+HOT_QUERIES = {
+    'user by phone number': select(User).where(User.phone_number == '555'),
+    'admin by name': select(Admin).where(Admin.name == 'admin'),
+    'orders by user': select(Order).where(Order.user_id == 1)
+    .order_by(Order.created_at.desc()),
+    'order history page': select(Order).where(Order.user_id == 1)
+    .where(tuple_(Order.created_at, Order.id) < (datetime(2030, 1, 1), 1))
+    .order_by(Order.created_at.desc(), Order.id.desc()).limit(20),
+    'user order total': select(func.sum(Order.total_price))
+    .where(Order.user_id == 1),
+    'most ordered item by user': select(OrderMenuItems.item_name)
+    .join(Order, Order.id == OrderMenuItems.order_id)
+    .where(Order.user_id == 1)
+    .group_by(OrderMenuItems.item_name)
+    .order_by(desc(func.sum(OrderMenuItems.quantity))),
+    'orders page': orders_page_statement(
+        after=(datetime(2030, 1, 1), 1), limit=20),
+    'done orders page': orders_page_statement(
+        [OrderStatus.DONE], (datetime(2030, 1, 1), 1), limit=20),
+    'active orders page': orders_page_statement(ACTIVE_ORDER_STATUSES,
+                                                limit=20),
+    'order lines by menu item': select(OrderMenuItems)
+    .where(OrderMenuItems.menu_item_id == 1),
+    'order changes': select(OrderChange).where(OrderChange.seq > 1)
+    .order_by(OrderChange.seq).limit(501),
+    'orders by id': order_rows_statement().where(Order.id.in_((1, 2, 3))),
+}
+
+
+def explain(engine, statement) -> list[str]:
+    sql = str(statement.compile(dialect=engine.dialect,
+                                compile_kwargs={'literal_binds': True}))
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in rows]
+
+
+def is_full_scan(detail: str, subqueries=()) -> bool:
+    # "SCAN order" reads every row; "SCAN order USING INDEX ..." walks an
+    # index in order and "SEARCH ..." seeks into one. Scanning a subquery
+    # only reads the rows it produced.
+    return (detail.startswith('SCAN ') and ' USING ' not in detail
+            and detail.split()[1] not in subqueries)
+
+
+def find_full_scans(plan: list[str]) -> list[str]:
+    subqueries = {detail.split()[1] for detail in plan
+                  if detail.startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+    return [detail for detail in plan if is_full_scan(detail, subqueries)]
+
+
+def check_query_plans(engine) -> dict[str, list[str]]:
+    # Returns the full table scans found in each hot query's plan, so an
+    # empty result means every query is served by an index
+    return {name: scans
+            for name, statement in HOT_QUERIES.items()
+            if (scans := find_full_scans(explain(engine, statement)))}
+
+
+if __name__ == '__main__':
+    import sys
+
+    from services import engine
+
+    for name, statement in HOT_QUERIES.items():
+        print(name)
+        for detail in explain(engine, statement):
+            print(f"    {detail}")
+    full_scans = check_query_plans(engine)
+    for name, scans in full_scans.items():
+        print(f"Full scan in {name}: {'; '.join(scans)}")
+    sys.exit(1 if full_scans else 0)
@@ -0,0 +1,237 @@
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Off when unset or 0, every action when 1, otherwise the fraction of
+# actions to record, e.g. PIZZERIA_SQL_STATS=0.05 in production
+SAMPLE_ENV = 'PIZZERIA_SQL_STATS'
+
+# The same statement this many times within one action is reported as a
+# likely N+1: a query per row where one query for all rows would do
+N_PLUS_ONE_THRESHOLD = 5
+
+# Actions kept for the debug overlay
+RECENT_ACTIONS = 20
+
+
+class ActionStats(NamedTuple):
+    name: str
+    queries: int
+    seconds: float
+    rows: int
+    # (statement, times executed) over the N+1 threshold
+    repeated: tuple[tuple[str, int], ...]
+
+
+class ActionTotals(NamedTuple):
+    calls: int
+    queries: int
+    seconds: float
+    rows: int
+    n_plus_one_calls: int
+
+
+class ActionRecord:
+    # Collects the queries of one sampled action. Only the thread running
+    # the action touches it, so it needs no lock.
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.statements: Counter[str] = Counter()
+
+    def finish(self) -> ActionStats:
+        repeated = tuple((statement, count) for statement, count
+                         in self.statements.most_common()
+                         if count >= N_PLUS_ONE_THRESHOLD)
+        return ActionStats(self.name, self.queries, self.seconds, self.rows,
+                           repeated)
+
+
+class CountingCursor:
+    # Stands in for the DBAPI cursor while SQLAlchemy builds the result, so
+    # rows are counted as they are fetched. SQLite produces rows lazily, so
+    # fetching is timed as well as executing.
+
+    def __init__(self, cursor, record: ActionRecord):
+        self.__cursor = cursor
+        self.__record = record
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self.__cursor.fetchone()
+        self.__fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args):
+        started = time.perf_counter()
+        rows = self.__cursor.fetchmany(*args)
+        self.__fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self.__cursor.fetchall()
+        self.__fetched(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        while (row := self.fetchone()) is not None:
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self.__cursor, name)
+
+    def __fetched(self, started: float, rows: int) -> None:
+        self.__record.seconds += time.perf_counter() - started
+        self.__record.rows += rows
+
+
+def sample_rate_from_env() -> float:
+    value = os.environ.get(SAMPLE_ENV, '0')
+    try:
+        rate = float(value)
+    except ValueError:
+        raise ValueError(f"{SAMPLE_ENV} must be a number between 0 and 1, "
+                         f"got {value!r}") from None
+    return min(max(rate, 0.0), 1.0)
+
+
+class QueryTracker:
+    # Attributes the SQL a thread runs to its current action: a DbExecutor
+    # request (by tag) or a manager method. Only sampled actions pay for
+    # timing and counting; for the rest each query costs one ContextVar
+    # lookup.
+
+    def __init__(self, sample_rate: float = 0.0):
+        self.sample_rate = sample_rate
+        # None outside an action, False inside one that wasn't sampled
+        self.__current: ContextVar[ActionRecord | bool | None] = ContextVar(
+            'query_stats_action', default=None)
+        self.__lock = threading.Lock()
+        self.__totals: dict[str, ActionTotals] = {}
+        self.__recent: deque[ActionStats] = deque(maxlen=RECENT_ACTIONS)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def install(self, engine) -> None:
+        from sqlalchemy import event
+
+        event.listen(engine, 'before_cursor_execute',
+                     self.__before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute',
+                     self.__after_cursor_execute)
+
+    @contextmanager
+    def action(self, name: str):
+        # Nested actions, e.g. a manager method inside a tagged request,
+        # count towards the outermost one, and are sampled with it
+        if not self.enabled or self.__current.get() is not None:
+            yield
+            return
+        record = (ActionRecord(name) if random.random() < self.sample_rate
+                  else False)
+        token = self.__current.set(record)
+        try:
+            yield
+        finally:
+            self.__current.reset(token)
+            if record:
+                self.__record(record.finish())
+
+    def totals(self) -> dict[str, ActionTotals]:
+        with self.__lock:
+            return dict(self.__totals)
+
+    def recent(self) -> list[ActionStats]:
+        with self.__lock:
+            return list(self.__recent)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__totals.clear()
+            self.__recent.clear()
+
+    def log_totals(self) -> None:
+        for name, totals in sorted(self.totals().items(),
+                                   key=lambda item: -item[1].seconds):
+            logger.info("%s: %d calls, %d queries, %.1f ms, %d rows%s", name,
+                        totals.calls, totals.queries, totals.seconds * 1000,
+                        totals.rows,
+                        f", {totals.n_plus_one_calls} with likely N+1"
+                        if totals.n_plus_one_calls else "")
+
+    def __record(self, stats: ActionStats) -> None:
+        with self.__lock:
+            previous = self.__totals.get(stats.name, ActionTotals(0, 0, 0, 0,
+                                                                  0))
+            self.__totals[stats.name] = ActionTotals(
+                previous.calls + 1, previous.queries + stats.queries,
+                previous.seconds + stats.seconds, previous.rows + stats.rows,
+                previous.n_plus_one_calls + bool(stats.repeated))
+            self.__recent.append(stats)
+        logger.debug("%s: %d queries, %.1f ms, %d rows", stats.name,
+                     stats.queries, stats.seconds * 1000, stats.rows)
+        for statement, count in stats.repeated:
+            logger.warning("Likely N+1 in %s: ran %d times: %s", stats.name,
+                           count, ' '.join(statement.split()))
+
+    def __before_cursor_execute(self, conn, cursor, statement, parameters,
+                                context, executemany):
+        if self.__current.get():
+            conn.info.setdefault('query_stats_start', []).append(
+                time.perf_counter())
+
+    def __after_cursor_execute(self, conn, cursor, statement, parameters,
+                               context, executemany):
+        record = self.__current.get()
+        if not record:
+            return
+        record.seconds += (time.perf_counter() -
+                           conn.info['query_stats_start'].pop())
+        record.queries += 1
+        record.statements[statement] += 1
+        if cursor.description is None:
+            # Writes report their row count up front
+            record.rows += max(cursor.rowcount, 0)
+        elif context is not None:
+            context.cursor = CountingCursor(cursor, record)
+
+
+def action_name(fn, tag: str | None = None) -> str:
+    # "AdminPage.on_status_change" for a lambda defined in that method
+    return tag or getattr(fn, '__qualname__', repr(fn)).split('.<locals>')[0]
+
+
+def instrumented(cls):
+    # Class decorator: each public method becomes an action of its own when
+    # called outside one, e.g. from a script or a benchmark
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not callable(method):
+            continue
+        setattr(cls, name, _as_action(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+def _as_action(name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with tracker.action(name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+tracker = QueryTracker(sample_rate_from_env())
@@ -0,0 +1,267 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# Set to 1 to profile screen entry points from startup; admins can also
+# switch profiling on from the stats screen (triple-tap the order count)
+PROFILE_ENV = 'PIZZERIA_RENDER_PROFILE'
+
+# One JSON object per line, rotated so a kiosk never keeps more than
+# REPORT_MAX_BYTES * (REPORT_BACKUPS + 1) of it
+REPORT_FILE = 'render_profile.jsonl'
+REPORT_MAX_BYTES = 1024 * 1024
+REPORT_BACKUPS = 4
+
+# Frames slower than this are counted as spikes (20 fps)
+FRAME_SPIKE_S = 0.05
+
+# Frames tracemalloc keeps per allocation; 1 is enough for totals
+TRACEMALLOC_FRAMES = 1
+
+
+class ScreenProfile:
+    # One show_*/back_to_* call and everything it set off: the DB requests
+    # it submitted, their result handlers, texture loads, and frames until
+    # the first frame drawn after the last result arrived.
+    #
+    # db_s is time spent on the DB worker, image_s loading textures, and
+    # widget_s the rest of the main-thread time in the entry point and the
+    # result handlers. wall_s runs from the call to that last frame, so it
+    # also covers waiting.
+
+    def __init__(self, name: str, screen_manager):
+        self.name = name
+        self.screen_manager = screen_manager
+        self.started = time.perf_counter()
+        self.db_s = 0.0
+        self.image_s = 0.0
+        self.main_s = 0.0
+        self.image_in_main_s = 0.0
+        self.in_main = False
+        self.requests = 0
+        self.pending = 0
+        self.entered = False
+        self.finished = False
+        self.frame_spikes = 0
+        self.max_frame_s = 0.0
+        self.lock = threading.Lock()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.traced_before = tracemalloc.get_traced_memory()[0]
+
+    def report(self) -> dict:
+        screen = self.screen_manager.current_screen
+        report = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'entry_point': self.name,
+            'screen': screen.name if screen else None,
+            'wall_ms': (time.perf_counter() - self.started) * 1000,
+            'db_ms': self.db_s * 1000,
+            'image_ms': self.image_s * 1000,
+            'widget_ms': (self.main_s - self.image_in_main_s) * 1000,
+            'db_requests': self.requests,
+            'widgets': sum(1 for _ in screen.walk()) if screen else 0,
+            'screens': len(self.screen_manager.screens),
+            'frame_spikes': self.frame_spikes,
+            'max_frame_ms': self.max_frame_s * 1000,
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report['alloc_delta_kb'] = (current - self.traced_before) / 1024
+            report['alloc_peak_kb'] = (peak - self.traced_before) / 1024
+        return report
+
+
+class RenderProfiler:
+    # Everything except the DB worker's timing runs on the Kivy main thread
+
+    def __init__(self, report_path: str = REPORT_FILE):
+        self.report_path = report_path
+        self.enabled = False
+        self.active: ScreenProfile | None = None
+        self.__depth = 0
+        self.__frame_event = None
+        self.__report = None
+
+    def enable(self) -> None:
+        from kivy.clock import Clock
+
+        if self.enabled:
+            return
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        # A lambda, as Clock can't look up name-mangled bound methods
+        self.__frame_event = Clock.schedule_interval(
+            lambda dt: self.__on_frame(dt), 0)
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.__frame_event.cancel()
+        tracemalloc.stop()
+        self.active = None
+
+    def toggle(self) -> bool:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    @contextmanager
+    def entry_point(self, name: str, screen_manager):
+        # Entry points called from another one, e.g. back_to_orders ->
+        # show_admin_order_screen, belong to the outer profile
+        if not self.enabled or self.__depth:
+            self.__depth += 1
+            try:
+                yield
+            finally:
+                self.__depth -= 1
+            return
+        if self.active is not None:
+            self.__finish(self.active)
+        profile = self.active = ScreenProfile(name, screen_manager)
+        self.__depth += 1
+        try:
+            with self.__main_thread(profile):
+                yield
+        finally:
+            self.__depth -= 1
+            profile.entered = True
+            self.__maybe_finish(profile)
+
+    def attach_request(self) -> ScreenProfile | None:
+        # Called by DbExecutor.submit: the request, if one is made while a
+        # profile is open, is waited for and timed as part of it
+        profile = self.active
+        if profile is None or profile.finished:
+            return None
+        profile.requests += 1
+        profile.pending += 1
+        return profile
+
+    @staticmethod
+    @contextmanager
+    def db_phase(profile: ScreenProfile | None):
+        # On the DB worker
+        if profile is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with profile.lock:
+                profile.db_s += elapsed
+
+    @contextmanager
+    def delivery(self, profile: ScreenProfile | None):
+        # A request's result handler, back on the main thread
+        if profile is None:
+            yield
+            return
+        try:
+            with self.__main_thread(profile):
+                yield
+        finally:
+            profile.pending -= 1
+            self.__maybe_finish(profile)
+
+    @contextmanager
+    def image_phase(self):
+        profile = self.active
+        if profile is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            profile.image_s += elapsed
+            if profile.in_main:
+                profile.image_in_main_s += elapsed
+
+    @contextmanager
+    def __main_thread(self, profile: ScreenProfile):
+        started = time.perf_counter()
+        profile.in_main = True
+        try:
+            yield
+        finally:
+            profile.in_main = False
+            profile.main_s += time.perf_counter() - started
+
+    def __maybe_finish(self, profile: ScreenProfile) -> None:
+        # Finishes on the next frame, once its layout has run and drawn
+        from kivy.clock import Clock
+
+        if profile.entered and not profile.pending and not profile.finished:
+            Clock.schedule_once(lambda _: self.__finish(profile))
+
+    def __finish(self, profile: ScreenProfile) -> None:
+        if profile.finished:
+            return
+        profile.finished = True
+        if self.active is profile:
+            self.active = None
+        self.__write(profile.report())
+
+    def __on_frame(self, dt: float) -> None:
+        if dt < FRAME_SPIKE_S:
+            return
+        profile = self.active
+        if profile is not None:
+            profile.frame_spikes += 1
+            profile.max_frame_s = max(profile.max_frame_s, dt)
+        else:
+            self.__write({'time': datetime.now().isoformat(timespec='seconds'),
+                          'frame_spike_ms': dt * 1000})
+
+    def __write(self, report: dict) -> None:
+        if self.__report is None:
+            self.__report = logging.getLogger(f'{__name__}.report')
+            self.__report.propagate = False
+            self.__report.setLevel(logging.INFO)
+            handler = RotatingFileHandler(
+                self.report_path, maxBytes=REPORT_MAX_BYTES,
+                backupCount=REPORT_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.__report.addHandler(handler)
+        self.__report.info(json.dumps(report))
+
+
+def profiled_screens(cls):
+    # Class decorator for the pages: show_*_screen and back_to_* methods
+    # become profiled entry points. The page must have a screen_manager.
+    for name, method in list(vars(cls).items()):
+        if callable(method) and (name.startswith('back_to_') or (
+                name.startswith('show_') and name.endswith('_screen'))):
+            setattr(cls, name, _as_entry_point(f"{cls.__name__}.{name}",
+                                               method))
+    return cls
+
+
+def _as_entry_point(name: str, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with profiler.entry_point(name, self.screen_manager):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+profiler = RenderProfiler()
+if os.environ.get(PROFILE_ENV, '0') not in ('', '0'):
+    # Clock runs fine before the app starts
+    profiler.enable()
@@ -0,0 +1,30 @@
+from kivy.metrics import dp
+from kivy.uix.screenmanager import Screen
+
+import services
+from render_profile import profiler
+
+
+def show_screen(screen_manager, name, build):
+    # Screens are built on first visit and kept; later visits only switch
+    if not screen_manager.has_screen(name):
+        screen = Screen(name=name)
+        build(screen)
+        screen_manager.add_widget(screen)
+    screen_manager.current = name
+    return screen_manager.get_screen(name)
+
+
+def find_row_index(data, row_id: int) -> int | None:
+    for index, entry in enumerate(data):
+        if entry['row'].id == row_id:
+            return index
+    return None
+
+
+def menu_item_texture(image_key: str | None):
+    if not image_key:
+        return None
+    with profiler.image_phase():
+        return services.texture_cache.get(
+            services.thumbnails.source(image_key, dp(200)))
@@ -0,0 +1,126 @@
+import os
+import threading
+
+from db_executor import DbExecutor
+from events import PizzeriaEvents
+from guest_session import GuestSession
+from order_feed import OrderFeed
+from query_stats import tracker
+
+# SQLite database URL
+DATABASE_URL = "sqlite:///./pizzeria.db"
+# One of db.PROFILES; the PIZZERIA_DB_PROFILE environment variable wins
+DATABASE_PROFILE = 'production'
+
+# Set to an api_server.py address, e.g. http://10.0.0.5:8080, so kiosks share
+# one database through it instead of opening DATABASE_URL themselves
+API_URL = os.environ.get('PIZZERIA_API_URL')
+
+# User session info
+SESSION_FILE = 'session.json'
+LEGACY_SESSION_FILE = 'session_data.txt'
+
+# Cheap to create, needed by the first screen
+events = PizzeriaEvents()
+db_executor = DbExecutor()
+guest_session = GuestSession(SESSION_FILE, LEGACY_SESSION_FILE)
+order_feed = OrderFeed(db_executor, events,
+                       lambda: None if API_URL else get('engine'),
+                       lambda: get('admin_manager'))
+
+
+# The rest pull in SQLAlchemy, SQLModel and Pillow, so they are created on
+# first attribute access (`services.engine`), normally from the DB worker
+# that runs the startup migration rather than before the first frame
+
+def create_database_engine():
+    from db import create_db_engine
+    return create_db_engine(DATABASE_URL, DATABASE_PROFILE)
+
+
+def create_api_client():
+    from api_client import ApiClient
+    return ApiClient(API_URL)
+
+
+def create_user_manager():
+    if API_URL:
+        from api_client import ApiUserManager
+        return ApiUserManager(get('api_client'))
+    from managers import UserManager
+    return UserManager(get('engine'))
+
+
+def create_admin_manager():
+    if API_URL:
+        from api_client import ApiAdminManager
+        return ApiAdminManager(get('api_client'))
+    from managers import AdminManager
+    return AdminManager(get('engine'))
+
+
+def create_image_store():
+    from image_store import ImageStore
+    return ImageStore()
+
+
+def create_thumbnails():
+    from thumbnails import ThumbnailPipeline
+    return ThumbnailPipeline(get('image_store'))
+
+
+def create_texture_cache():
+    from texture_cache import TextureCache
+    return TextureCache()
+
+
+LAZY_SERVICES = {
+    'engine': create_database_engine,
+    'api_client': create_api_client,
+    'user_manager': create_user_manager,
+    'admin_manager': create_admin_manager,
+    'image_store': create_image_store,
+    'thumbnails': create_thumbnails,
+    'texture_cache': create_texture_cache,
+}
+
+# Reentrant because the managers' factories look up the engine
+_lazy_lock = threading.RLock()
+
+
+def get(name: str):
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = LAZY_SERVICES[name]()
+        return globals()[name]
+
+
+def __getattr__(name):
+    # Only called for names not yet in the module namespace
+    if name not in LAZY_SERVICES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get(name)
+
+
+def is_created(name: str) -> bool:
+    return name in globals()
+
+
+def migrate_database() -> int | None:
+    # The API server migrates the database it serves
+    if API_URL:
+        return None
+    from migrations import migrate
+    return migrate(get('engine'), get('image_store'))
+
+
+def shutdown() -> None:
+    order_feed.stop()
+    db_executor.shutdown()
+    if is_created('thumbnails'):
+        get('thumbnails').shutdown()
+    if is_created('api_client'):
+        get('api_client').close()
+    guest_session.flush()
+    if tracker.enabled:
+        tracker.log_totals()
@@ -0,0 +1,119 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Each run is a fresh interpreter, so module imports, window creation and
+# the database migration are all cold. The child reports its own timings as
+# one JSON line on stdout; the parent adds the wall-clock time of the whole
+# process and summarises the runs.
+
+CHILD_FLAG = '--child'
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_child() -> None:
+    start = time.perf_counter()
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    sys.path.insert(0, PACKAGE_DIR)
+    import main
+    import_s = time.perf_counter() - start
+
+    import resource
+
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+
+    import services
+
+    timings = {'import_s': import_s}
+    app = main.PizzeriaApp()
+
+    def finish():
+        # ru_maxrss is in kilobytes on Linux
+        timings['peak_rss_mb'] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss / 1024
+        timings['heavy_modules_at_first_frame'] = heavy_modules
+        print(json.dumps(timings), flush=True)
+        app.stop()
+
+    def on_database_ready(_):
+        timings['database_ready_s'] = time.perf_counter() - start
+        if 'first_frame_s' in timings:
+            finish()
+
+    def on_first_frame(*_):
+        Window.unbind(on_flip=on_first_frame)
+        timings['first_frame_s'] = time.perf_counter() - start
+        heavy_modules[:] = sorted(name for name in ('sqlalchemy', 'sqlmodel',
+                                                    'PIL', 'models')
+                                  if name in sys.modules)
+        if 'database_ready_s' in timings:
+            Clock.schedule_once(lambda _: finish())
+
+    heavy_modules = []
+    Window.bind(on_flip=on_first_frame)
+    # Queued behind the startup migration, so it completes once the
+    # database is usable
+    services.db_executor.submit(lambda: None, on_result=on_database_ready)
+    app.run()
+
+
+def run_once(workdir: str) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__),
+                             CHILD_FLAG], cwd=workdir, capture_output=True,
+                            text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_s'] = time.perf_counter() - started
+    return timings
+
+
+def summarise(runs: list[dict]) -> dict:
+    keys = [key for key, value in runs[0].items()
+            if isinstance(value, (int, float))]
+    return {key: {'median': statistics.median(run[key] for run in runs),
+                  'min': min(run[key] for run in runs),
+                  'max': max(run[key] for run in runs)}
+            for key in keys}
+
+
+def benchmark(runs: int, workdir: str | None = None) -> dict:
+    # Without a workdir every run starts from an empty directory, so the
+    # database is created and migrated each time
+    results = []
+    for _ in range(runs):
+        if workdir is None:
+            with tempfile.TemporaryDirectory() as tmp:
+                results.append(run_once(tmp))
+        else:
+            results.append(run_once(workdir))
+    return {'runs': results, 'summary': summarise(results)}
+
+
+if __name__ == '__main__':
+    if CHILD_FLAG in sys.argv:
+        run_child()
+        sys.exit(0)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Measure cold start: import time, time to the first "
+                    "frame, time until the database is ready and peak RSS")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workdir',
+                        help="directory holding an existing pizzeria.db; "
+                             "defaults to a fresh empty one per run")
+    parser.add_argument('--output', help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = benchmark(args.runs, args.workdir)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
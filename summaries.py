@@ -0,0 +1,520 @@
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from db import begin_now
+from models import OrderStatus
+
+# Item count of one order, used when a whole order moves between statuses
+ORDER_ITEM_COUNT = ('(SELECT coalesce(sum(quantity), 0) FROM ordermenuitems '
+                    'WHERE order_id = {0}.id)')
+
+# The triggers run inside the writing transaction, so the summary can't
+# disagree with the orders it describes, whichever code path wrote them
+ORDER_SUMMARY_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS ordersummary_order_insert
+    AFTER INSERT ON "order"
+    BEGIN
+        UPDATE ordersummary
+        SET order_count = order_count + 1,
+            revenue = revenue + NEW.total_price,
+            item_count = item_count + {ORDER_ITEM_COUNT.format('NEW')}
+        WHERE status = NEW.status;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS ordersummary_order_update
+    AFTER UPDATE OF status, total_price ON "order"
+    BEGIN
+        UPDATE ordersummary
+        SET order_count = order_count - 1,
+            revenue = revenue - OLD.total_price,
+            item_count = item_count - {ORDER_ITEM_COUNT.format('OLD')}
+        WHERE status = OLD.status;
+        UPDATE ordersummary
+        SET order_count = order_count + 1,
+            revenue = revenue + NEW.total_price,
+            item_count = item_count + {ORDER_ITEM_COUNT.format('NEW')}
+        WHERE status = NEW.status;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS ordersummary_order_delete
+    AFTER DELETE ON "order"
+    BEGIN
+        UPDATE ordersummary
+        SET order_count = order_count - 1,
+            revenue = revenue - OLD.total_price,
+            item_count = item_count - {ORDER_ITEM_COUNT.format('OLD')}
+        WHERE status = OLD.status;
+    END''',
+    # Lines of an order that no longer exists match no summary row, so
+    # deleting an order and its lines balances out in either order
+    '''CREATE TRIGGER IF NOT EXISTS ordersummary_line_insert
+    AFTER INSERT ON ordermenuitems
+    BEGIN
+        UPDATE ordersummary SET item_count = item_count + NEW.quantity
+        WHERE status = (SELECT status FROM "order"
+                        WHERE id = NEW.order_id);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS ordersummary_line_update
+    AFTER UPDATE OF quantity, order_id ON ordermenuitems
+    BEGIN
+        UPDATE ordersummary SET item_count = item_count - OLD.quantity
+        WHERE status = (SELECT status FROM "order"
+                        WHERE id = OLD.order_id);
+        UPDATE ordersummary SET item_count = item_count + NEW.quantity
+        WHERE status = (SELECT status FROM "order"
+                        WHERE id = NEW.order_id);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS ordersummary_line_delete
+    AFTER DELETE ON ordermenuitems
+    BEGIN
+        UPDATE ordersummary SET item_count = item_count - OLD.quantity
+        WHERE status = (SELECT status FROM "order"
+                        WHERE id = OLD.order_id);
+    END''',
+)
+
+ORDER_SUMMARY_FROM_SCRATCH = '''
+    SELECT "order".status, count(*), coalesce(sum(total_price), 0),
+           coalesce(sum(items.item_count), 0)
+    FROM "order"
+    LEFT JOIN (SELECT order_id, sum(quantity) AS item_count
+               FROM ordermenuitems GROUP BY order_id) AS items
+        ON items.order_id = "order".id
+    GROUP BY "order".status'''
+
+# Summed floats drift by rounding error, not by whole cents
+REVENUE_TOLERANCE = 0.005
+
+
+def compute_order_summary(connection) -> dict[str, tuple[int, float, int]]:
+    # Status name -> (order count, revenue, item count) from the raw tables
+    summary = {status.name: (0, 0.0, 0) for status in OrderStatus}
+    for status, *values in connection.exec_driver_sql(
+            ORDER_SUMMARY_FROM_SCRATCH):
+        summary[status] = tuple(values)
+    return summary
+
+
+def rebuild_order_summary(connection) -> None:
+    connection.exec_driver_sql('DELETE FROM ordersummary')
+    connection.exec_driver_sql(
+        'INSERT INTO ordersummary (status, order_count, revenue, item_count) '
+        'VALUES (?, ?, ?, ?)',
+        [(status, *values)
+         for status, values in compute_order_summary(connection).items()])
+
+
+def install_order_summary(connection) -> None:
+    for trigger in ORDER_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    rebuild_order_summary(connection)
+
+
+def verify_order_summary(engine) -> dict[str, tuple[tuple, tuple]]:
+    # Recomputes the summary and returns status -> (stored, actual) for
+    # every row that has drifted; an empty result means it is accurate
+    with engine.connect() as connection:
+        actual = compute_order_summary(connection)
+        stored = {status: tuple(values) for status, *values in
+                  connection.exec_driver_sql(
+                      'SELECT status, order_count, revenue, item_count '
+                      'FROM ordersummary')}
+    drift = {}
+    for status, values in actual.items():
+        row = stored.get(status)
+        if row is None or row[0] != values[0] or row[2] != values[2] or \
+                abs(row[1] - values[1]) > REVENUE_TOLERANCE:
+            drift[status] = (row, values)
+    return drift
+
+
+# Ties go to the alphabetically first item so rebuilds pick the same one
+USER_FAVOURITE = (
+    'UPDATE usersummary SET favourite_item = ('
+    '    SELECT item_name FROM useritemsummary'
+    '    WHERE useritemsummary.user_id = usersummary.user_id'
+    '    ORDER BY quantity DESC, item_name LIMIT 1) '
+    'WHERE user_id = {0}')
+
+LINE_USER = '(SELECT user_id FROM "order" WHERE id = {0}.order_id)'
+
+ADD_LINE_TO_USER = f'''
+        INSERT INTO useritemsummary (user_id, item_name, quantity)
+        SELECT user_id, NEW.item_name, NEW.quantity FROM "order"
+        WHERE id = NEW.order_id AND user_id IS NOT NULL
+            AND NEW.item_name IS NOT NULL
+        ON CONFLICT (user_id, item_name)
+        DO UPDATE SET quantity = quantity + excluded.quantity;
+        {USER_FAVOURITE.format(LINE_USER.format('NEW'))};'''
+
+REMOVE_LINE_FROM_USER = f'''
+        UPDATE useritemsummary SET quantity = quantity - OLD.quantity
+        WHERE user_id = {LINE_USER.format('OLD')}
+            AND item_name = OLD.item_name;
+        DELETE FROM useritemsummary
+        WHERE user_id = {LINE_USER.format('OLD')} AND quantity <= 0;
+        {USER_FAVOURITE.format(LINE_USER.format('OLD'))};'''
+
+# Same approach as the order summary: deleting an order takes its remaining
+# lines out of the item counts, and lines deleted later find no order
+USER_SUMMARY_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS usersummary_order_insert
+    AFTER INSERT ON "order" WHEN NEW.user_id IS NOT NULL
+    BEGIN
+        INSERT INTO usersummary (user_id, order_count, total_spent)
+        VALUES (NEW.user_id, 1, NEW.total_price)
+        ON CONFLICT (user_id)
+        DO UPDATE SET order_count = order_count + 1,
+                      total_spent = total_spent + excluded.total_spent;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS usersummary_order_update
+    AFTER UPDATE OF total_price ON "order" WHEN NEW.user_id IS NOT NULL
+    BEGIN
+        UPDATE usersummary
+        SET total_spent = total_spent - OLD.total_price + NEW.total_price
+        WHERE user_id = NEW.user_id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS usersummary_order_delete
+    AFTER DELETE ON "order" WHEN OLD.user_id IS NOT NULL
+    BEGIN
+        UPDATE usersummary
+        SET order_count = order_count - 1,
+            total_spent = total_spent - OLD.total_price
+        WHERE user_id = OLD.user_id;
+        DELETE FROM usersummary
+        WHERE user_id = OLD.user_id AND order_count <= 0;
+        UPDATE useritemsummary
+        SET quantity = quantity - (
+            SELECT coalesce(sum(quantity), 0) FROM ordermenuitems
+            WHERE order_id = OLD.id
+                AND item_name = useritemsummary.item_name)
+        WHERE user_id = OLD.user_id;
+        DELETE FROM useritemsummary
+        WHERE user_id = OLD.user_id AND quantity <= 0;
+        {USER_FAVOURITE.format('OLD.user_id')};
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS usersummary_line_insert
+    AFTER INSERT ON ordermenuitems
+    BEGIN{ADD_LINE_TO_USER}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS usersummary_line_update
+    AFTER UPDATE OF quantity, item_name, order_id ON ordermenuitems
+    BEGIN{REMOVE_LINE_FROM_USER}{ADD_LINE_TO_USER}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS usersummary_line_delete
+    AFTER DELETE ON ordermenuitems
+    BEGIN{REMOVE_LINE_FROM_USER}
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS usersummary_user_delete
+    AFTER DELETE ON user
+    BEGIN
+        DELETE FROM usersummary WHERE user_id = OLD.id;
+        DELETE FROM useritemsummary WHERE user_id = OLD.id;
+    END''',
+)
+
+
+def compute_user_summary(connection) -> dict[int, tuple]:
+    # User id -> (order count, total spent, favourite item, item counts)
+    # from the raw tables
+    item_counts = {}
+    for user_id, item_name, quantity in connection.exec_driver_sql(
+            'SELECT "order".user_id, item_name, sum(quantity) '
+            'FROM ordermenuitems '
+            'JOIN "order" ON "order".id = ordermenuitems.order_id '
+            'WHERE "order".user_id IS NOT NULL AND item_name IS NOT NULL '
+            'GROUP BY "order".user_id, item_name HAVING sum(quantity) > 0'):
+        item_counts.setdefault(user_id, {})[item_name] = quantity
+    summary = {}
+    for user_id, order_count, total_spent in connection.exec_driver_sql(
+            'SELECT user_id, count(*), sum(total_price) FROM "order" '
+            'WHERE user_id IS NOT NULL GROUP BY user_id'):
+        counts = item_counts.get(user_id, {})
+        favourite = min(counts, key=lambda name: (-counts[name], name),
+                        default=None)
+        summary[user_id] = (order_count, total_spent, favourite, counts)
+    return summary
+
+
+def rebuild_user_summary(connection) -> None:
+    summary = compute_user_summary(connection)
+    connection.exec_driver_sql('DELETE FROM usersummary')
+    connection.exec_driver_sql('DELETE FROM useritemsummary')
+    if not summary:
+        return
+    connection.exec_driver_sql(
+        'INSERT INTO usersummary '
+        '(user_id, order_count, total_spent, favourite_item) '
+        'VALUES (?, ?, ?, ?)',
+        [(user_id, *values[:3]) for user_id, values in summary.items()])
+    item_rows = [(user_id, item_name, quantity)
+                 for user_id, values in summary.items()
+                 for item_name, quantity in values[3].items()]
+    if item_rows:
+        connection.exec_driver_sql(
+            'INSERT INTO useritemsummary (user_id, item_name, quantity) '
+            'VALUES (?, ?, ?)', item_rows)
+
+
+def install_user_summary(connection) -> None:
+    for trigger in USER_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    rebuild_user_summary(connection)
+
+
+def verify_user_summary(engine) -> dict[int, tuple[tuple, tuple]]:
+    # Same contract as verify_order_summary, keyed by user id
+    with engine.connect() as connection:
+        actual = compute_user_summary(connection)
+        stored = {user_id: (order_count, total_spent, favourite, {})
+                  for user_id, order_count, total_spent, favourite in
+                  connection.exec_driver_sql(
+                      'SELECT user_id, order_count, total_spent, '
+                      'favourite_item FROM usersummary')}
+        for user_id, item_name, quantity in connection.exec_driver_sql(
+                'SELECT user_id, item_name, quantity FROM useritemsummary'):
+            stored.setdefault(user_id, (0, 0.0, None, {}))[3][item_name] = \
+                quantity
+    drift = {}
+    for user_id in actual.keys() | stored.keys():
+        row, values = stored.get(user_id), actual.get(user_id)
+        if row is None or values is None or \
+                (row[0], row[2], row[3]) != (values[0], values[2],
+                                             values[3]) or \
+                abs(row[1] - values[1]) > REVENUE_TOLERANCE:
+            drift[user_id] = (row, values)
+    return drift
+
+
+# Rollup table -> strftime format truncating created_at to its bucket, in
+# the same text form SQLAlchemy stores datetimes in so range filters compare
+SALES_ROLLUPS = {
+    'hourlysales': '%Y-%m-%d %H:00:00.000000',
+    'dailysales': '%Y-%m-%d 00:00:00.000000',
+}
+
+LINE_REVENUE = '{0}.quantity * coalesce({0}.unit_price, 0)'
+
+SALES_ROLLUP_TRIGGERS = '''
+CREATE TRIGGER IF NOT EXISTS {table}_order_insert
+AFTER INSERT ON "order"
+BEGIN
+    INSERT INTO {table}
+        (bucket, menu_item_id, order_count, revenue, item_count)
+    VALUES ({order_bucket}, 0, 1, NEW.total_price, 0)
+    ON CONFLICT (bucket, menu_item_id)
+    DO UPDATE SET order_count = order_count + 1,
+                  revenue = revenue + excluded.revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_order_update
+AFTER UPDATE OF total_price ON "order"
+BEGIN
+    UPDATE {table} SET revenue = revenue - OLD.total_price + NEW.total_price
+    WHERE bucket = {old_order_bucket} AND menu_item_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_order_delete
+AFTER DELETE ON "order"
+BEGIN
+    UPDATE {table}
+    SET order_count = order_count - 1,
+        revenue = revenue - (SELECT {line_revenue} FROM ordermenuitems AS line
+                             WHERE line.order_id = OLD.id
+                                 AND line.menu_item_id = {table}.menu_item_id),
+        item_count = item_count - (
+            SELECT line.quantity FROM ordermenuitems AS line
+            WHERE line.order_id = OLD.id
+                AND line.menu_item_id = {table}.menu_item_id)
+    WHERE bucket = {old_order_bucket} AND menu_item_id IN (
+        SELECT menu_item_id FROM ordermenuitems WHERE order_id = OLD.id);
+    UPDATE {table}
+    SET order_count = order_count - 1,
+        revenue = revenue - OLD.total_price,
+        item_count = item_count - {order_item_count}
+    WHERE bucket = {old_order_bucket} AND menu_item_id = 0;
+    DELETE FROM {table}
+    WHERE bucket = {old_order_bucket} AND order_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_line_insert
+AFTER INSERT ON ordermenuitems
+BEGIN{add_line}
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_line_update
+AFTER UPDATE OF quantity, unit_price, order_id, menu_item_id
+ON ordermenuitems
+BEGIN{remove_line}{add_line}
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_line_delete
+AFTER DELETE ON ordermenuitems
+BEGIN{remove_line}
+END'''
+
+ADD_LINE_TO_ROLLUP = '''
+    INSERT INTO {table}
+        (bucket, menu_item_id, order_count, revenue, item_count)
+    SELECT {line_bucket}, NEW.menu_item_id, 1, {line_revenue}, NEW.quantity
+    FROM "order" WHERE id = NEW.order_id
+    ON CONFLICT (bucket, menu_item_id)
+    DO UPDATE SET order_count = order_count + 1,
+                  revenue = revenue + excluded.revenue,
+                  item_count = item_count + excluded.item_count;
+    UPDATE {table} SET item_count = item_count + NEW.quantity
+    WHERE bucket = (SELECT {line_bucket} FROM "order"
+                    WHERE id = NEW.order_id)
+        AND menu_item_id = 0;'''
+
+REMOVE_LINE_FROM_ROLLUP = '''
+    UPDATE {table}
+    SET order_count = order_count - 1,
+        revenue = revenue - {line_revenue},
+        item_count = item_count - OLD.quantity
+    WHERE bucket = (SELECT {line_bucket} FROM "order"
+                    WHERE id = OLD.order_id)
+        AND menu_item_id = OLD.menu_item_id;
+    UPDATE {table} SET item_count = item_count - OLD.quantity
+    WHERE bucket = (SELECT {line_bucket} FROM "order"
+                    WHERE id = OLD.order_id)
+        AND menu_item_id = 0;
+    DELETE FROM {table}
+    WHERE bucket = (SELECT {line_bucket} FROM "order"
+                    WHERE id = OLD.order_id)
+        AND order_count <= 0;'''
+
+
+def sales_rollup_triggers(table: str) -> list[str]:
+    bucket = f"strftime('{SALES_ROLLUPS[table]}', {{0}})"
+    names = {'table': table, 'line_bucket': bucket.format('created_at')}
+    add_line = ADD_LINE_TO_ROLLUP.format(
+        line_revenue=LINE_REVENUE.format('NEW'), **names)
+    remove_line = REMOVE_LINE_FROM_ROLLUP.format(
+        line_revenue=LINE_REVENUE.format('OLD'), **names)
+    return SALES_ROLLUP_TRIGGERS.format(
+        order_bucket=bucket.format('NEW.created_at'),
+        old_order_bucket=bucket.format('OLD.created_at'),
+        line_revenue=LINE_REVENUE.format('line'),
+        order_item_count=ORDER_ITEM_COUNT.format('OLD'),
+        add_line=add_line, remove_line=remove_line, **names).split(';\n\n')
+
+
+def compute_sales_rollup(connection, table: str) -> dict[tuple, tuple]:
+    # (bucket, menu item id) -> (order count, revenue, item count) from the
+    # raw tables, with menu item id 0 for the per-bucket totals
+    bucket = f"strftime('{SALES_ROLLUPS[table]}', \"order\".created_at)"
+    rollup = {}
+    for bucket_start, menu_item_id, *values in connection.exec_driver_sql(
+            f'SELECT {bucket}, menu_item_id, count(*), '
+            f'sum({LINE_REVENUE.format("ordermenuitems")}), sum(quantity) '
+            f'FROM ordermenuitems '
+            f'JOIN "order" ON "order".id = ordermenuitems.order_id '
+            f'GROUP BY 1, 2'):
+        rollup[bucket_start, menu_item_id] = tuple(values)
+    for bucket_start, *values in connection.exec_driver_sql(
+            f'SELECT {bucket}, count(*), sum(total_price), '
+            f'coalesce(sum(items.item_count), 0) FROM "order" '
+            f'LEFT JOIN (SELECT order_id, sum(quantity) AS item_count '
+            f'           FROM ordermenuitems GROUP BY order_id) AS items '
+            f'    ON items.order_id = "order".id '
+            f'GROUP BY 1'):
+        rollup[bucket_start, 0] = tuple(values)
+    return rollup
+
+
+def rebuild_sales_rollup(connection, table: str) -> None:
+    rollup = compute_sales_rollup(connection, table)
+    connection.exec_driver_sql(f'DELETE FROM {table}')
+    if rollup:
+        connection.exec_driver_sql(
+            f'INSERT INTO {table} '
+            f'(bucket, menu_item_id, order_count, revenue, item_count) '
+            f'VALUES (?, ?, ?, ?, ?)',
+            [(*key, *values) for key, values in rollup.items()])
+
+
+def install_sales_rollups(connection) -> None:
+    for table in SALES_ROLLUPS:
+        for trigger in sales_rollup_triggers(table):
+            connection.exec_driver_sql(trigger)
+        rebuild_sales_rollup(connection, table)
+
+
+def verify_sales_rollups(engine) -> dict[tuple, tuple[tuple, tuple]]:
+    # Same contract as verify_order_summary, keyed by
+    # (table, bucket, menu item id)
+    drift = {}
+    with engine.connect() as connection:
+        for table in SALES_ROLLUPS:
+            actual = compute_sales_rollup(connection, table)
+            stored = {(bucket, menu_item_id): tuple(values)
+                      for bucket, menu_item_id, *values in
+                      connection.exec_driver_sql(
+                          f'SELECT bucket, menu_item_id, order_count, '
+                          f'revenue, item_count FROM {table}')}
+            for key in actual.keys() | stored.keys():
+                row, values = stored.get(key), actual.get(key)
+                if row is None or values is None or \
+                        (row[0], row[2]) != (values[0], values[2]) or \
+                        abs(row[1] - values[1]) > REVENUE_TOLERANCE:
+                    drift[(table, *key)] = (row, values)
+    return drift
+
+
+def summary_triggers() -> list[str]:
+    return [*ORDER_SUMMARY_TRIGGERS, *USER_SUMMARY_TRIGGERS,
+            *(trigger for table in SALES_ROLLUPS
+              for trigger in sales_rollup_triggers(table))]
+
+
+def rebuild_summaries(connection) -> None:
+    rebuild_order_summary(connection)
+    rebuild_user_summary(connection)
+    for table in SALES_ROLLUPS:
+        rebuild_sales_rollup(connection, table)
+
+
+@contextmanager
+def summaries_suspended(connection):
+    # For bulk writes: drops the summary triggers for the duration and
+    # rebuilds every summary in one pass afterwards, which beats running
+    # the triggers row by row. The drops join the connection's transaction,
+    # so other connections never see the tables without their triggers and
+    # a rollback brings them back; they are put back even on failure.
+    begin_now(connection)
+    for trigger in summary_triggers():
+        name = re.search(r'IF NOT EXISTS (\w+)', trigger).group(1)
+        connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {name}')
+    try:
+        yield
+    finally:
+        for trigger in summary_triggers():
+            connection.exec_driver_sql(trigger)
+        rebuild_summaries(connection)
+
+
+@event.listens_for(SQLModel.metadata, 'after_create')
+def install_summaries(_, connection, **__):
+    # create_all makes the tables in dependency order; the triggers span
+    # several of them, so they go in once everything exists
+    install_order_summary(connection)
+    install_user_summary(connection)
+    install_sales_rollups(connection)
+
+
+if __name__ == '__main__':
+    import sys
+
+    from services import engine
+
+    drift = {**verify_order_summary(engine), **verify_user_summary(engine),
+             **verify_sales_rollups(engine)}
+    for key, (stored, actual) in drift.items():
+        print(f"{key}: stored {stored}, recomputed {actual}")
+    if drift and '--repair' in sys.argv:
+        with engine.begin() as connection:
+            rebuild_summaries(connection)
+        print("Rebuilt the order, user and sales summaries")
+    sys.exit(1 if drift and '--repair' not in sys.argv else 0)
@@ -0,0 +1,62 @@
+import io
+import os
+from collections import OrderedDict
+
+from kivy.core.image import Image as CoreImage
+from kivy.graphics.texture import Texture
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TextureCache:
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__textures: OrderedDict[str, Texture] = OrderedDict()
+
+    def get(self, path: str) -> Texture | None:
+        # Store paths are content addressed, so the path is the identity
+        texture = self.__textures.get(path)
+        if texture is not None:
+            self.__textures.move_to_end(path)
+            self.hits += 1
+            return texture
+
+        self.misses += 1
+        try:
+            with open(path, 'rb') as f:
+                data = io.BytesIO(f.read())
+            extension = os.path.splitext(path)[1].lstrip('.') or 'jpg'
+            texture = CoreImage(data, ext=extension, nocache=True).texture
+        except Exception:
+            return None
+        self.__put(path, texture)
+        return texture
+
+    def clear(self) -> None:
+        self.__textures.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.__textures),
+                'size_bytes': self.size_bytes,
+                'max_bytes': self.max_bytes}
+
+    def __put(self, path: str, texture: Texture) -> None:
+        self.__textures[path] = texture
+        self.size_bytes += texture_size(texture)
+        while self.size_bytes > self.max_bytes and len(self.__textures) > 1:
+            _, evicted = self.__textures.popitem(last=False)
+            self.size_bytes -= texture_size(evicted)
+            self.evictions += 1
+
+
+def texture_size(texture: Texture) -> int:
+    return texture.width * texture.height * 4
@@ -0,0 +1,86 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from image_store import ImageStore
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes in pixels, smallest first
+VARIANTS = {
+    'card': (400, 400),
+    'detail': (1024, 1024),
+}
+JPEG_QUALITY = 80
+
+
+def encode_variant(source_path: str, size: tuple[int, int]) -> bytes:
+    with Image.open(source_path) as image:
+        # Lets the JPEG decoder downscale by a power of two while decoding
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True,
+                   progressive=True)
+        return buffer.getvalue()
+
+
+class ThumbnailPipeline:
+
+    def __init__(self, image_store: ImageStore, max_workers: int = 1):
+        self.__image_store = image_store
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers,
+                                             thread_name_prefix='thumbnails')
+        self.__pending: dict[str, Future] = {}
+        self.__lock = threading.RLock()
+
+    def submit(self, key: str) -> Future:
+        with self.__lock:
+            future = self.__pending.get(key)
+            if future is None:
+                future = self.__executor.submit(self.generate, key)
+                self.__pending[key] = future
+                future.add_done_callback(lambda _: self.__done(key))
+            return future
+
+    def generate(self, key: str) -> dict[str, str]:
+        paths = {}
+        for variant, size in VARIANTS.items():
+            path = self.__image_store.variant_path(key, variant)
+            if not os.path.exists(path):
+                try:
+                    data = encode_variant(self.__image_store.path(key), size)
+                except (OSError, ValueError):
+                    logger.exception("Can't build %s variant of %s",
+                                     variant, key)
+                    continue
+                self.__image_store.put_variant(key, variant, data)
+            paths[variant] = path
+        return paths
+
+    def source(self, key: str, size_px: float) -> str:
+        # Smallest variant covering size_px; the original is served (and the
+        # variants queued) until the worker has produced them
+        variant = next((name for name, size in VARIANTS.items()
+                        if max(size) >= size_px), None)
+        if variant is None:
+            return self.__image_store.path(key)
+        path = self.__image_store.variant_path(key, variant)
+        if os.path.exists(path):
+            return path
+        self.submit(key)
+        return self.__image_store.path(key)
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __done(self, key: str) -> None:
+        with self.__lock:
+            self.__pending.pop(key, None)
@@ -0,0 +1,216 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from sqlalchemy import func, insert
+from sqlmodel import select
+
+from models import User, MenuItem, Order, OrderMenuItems, OrderStatus
+from order_changes import order_changes_suspended
+from summaries import summaries_suspended
+
+# Rows pulled from the cursor and written per batch; memory stays flat
+# however large the table is
+BATCH_SIZE = 5000
+
+USER_FIELDS = ('id', 'first_name', 'last_name', 'phone_number')
+MENU_ITEM_FIELDS = ('id', 'name', 'price', 'description', 'weight', 'radius',
+                    'image_key')
+ORDER_FIELDS = ('id', 'created_at', 'status', 'total_price', 'user_id',
+                'first_name', 'last_name', 'phone_number', 'lines')
+
+# Line items travel as one JSON array per order, in CSV as well as JSONL
+ORDER_LINES = func.json_group_array(func.json_object(
+    'menu_item_id', OrderMenuItems.menu_item_id,
+    'item_name', OrderMenuItems.item_name,
+    'quantity', OrderMenuItems.quantity,
+    'unit_price', OrderMenuItems.unit_price))
+
+TABLES = {
+    'users': (select(*(getattr(User, name) for name in USER_FIELDS))
+              .order_by(User.id), USER_FIELDS),
+    'menu': (select(*(getattr(MenuItem, name) for name in MENU_ITEM_FIELDS))
+             .order_by(MenuItem.id), MENU_ITEM_FIELDS),
+    # Grouping by the primary key lets SQLite walk order and its lines in
+    # rowid order, so rows stream out without a sort
+    'orders': (select(Order.id, Order.created_at, Order.status,
+                      Order.total_price, Order.user_id, User.first_name,
+                      User.last_name, User.phone_number,
+                      func.iif(func.count(OrderMenuItems.order_id) > 0,
+                               ORDER_LINES, '[]'))
+               .select_from(Order)
+               .outerjoin(User, User.id == Order.user_id)
+               .outerjoin(OrderMenuItems, OrderMenuItems.order_id == Order.id)
+               .group_by(Order.id).order_by(Order.id), ORDER_FIELDS),
+}
+
+
+def iter_records(engine, table: str) -> Iterator[dict]:
+    statement, fields = TABLES[table]
+    with engine.connect() as connection:
+        result = connection.execution_options(yield_per=BATCH_SIZE).execute(
+            statement)
+        for row in result:
+            record = dict(zip(fields, row))
+            if table == 'orders':
+                record['created_at'] = record['created_at'].isoformat()
+                record['status'] = record['status'].name
+                record['lines'] = json.loads(record['lines'])
+            yield record
+
+
+def export_table(engine, table: str, out: IO[str], fmt: str = 'jsonl') -> int:
+    # Streams a table to an open text file as CSV or JSONL and returns the
+    # number of records written
+    fields = TABLES[table][1]
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+    elif fmt != 'jsonl':
+        raise ValueError(f"Unknown export format {fmt!r}, expected csv or "
+                         f"jsonl")
+    count = 0
+    for record in iter_records(engine, table):
+        if fmt == 'csv':
+            if 'lines' in record:
+                record['lines'] = json.dumps(record['lines'])
+            writer.writerow(record)
+        else:
+            out.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+
+def read_records(source: IO[str], fmt: str = 'jsonl') -> Iterator[dict]:
+    # CSV values arrive as strings; the importers convert what they need
+    if fmt == 'csv':
+        yield from csv.DictReader(source)
+    elif fmt == 'jsonl':
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown import format {fmt!r}, expected csv or "
+                         f"jsonl")
+
+
+def optional(value, convert):
+    # Empty CSV cells and JSON nulls both mean "not set"
+    return None if value in (None, '') else convert(value)
+
+
+def to_user_params(record: dict) -> dict:
+    return {'id': optional(record.get('id'), int),
+            'first_name': record['first_name'],
+            'last_name': record['last_name'],
+            'phone_number': str(record['phone_number'])}
+
+
+def to_menu_item_params(record: dict) -> dict:
+    return {'id': optional(record.get('id'), int),
+            'name': record['name'],
+            'price': float(record['price']),
+            'description': record['description'],
+            'weight': int(record['weight']),
+            'radius': int(record['radius']),
+            'image_key': optional(record.get('image_key'), str)}
+
+
+def to_order_params(record: dict) -> tuple[dict, list[dict]]:
+    order_id = int(record['id'])
+    lines = record.get('lines') or []
+    if isinstance(lines, str):
+        lines = json.loads(lines)
+    order = {'id': order_id,
+             'created_at': datetime.fromisoformat(record['created_at']),
+             'status': OrderStatus[record['status']],
+             'total_price': float(record['total_price']),
+             'user_id': optional(record.get('user_id'), int)}
+    return order, [{'order_id': order_id,
+                    'menu_item_id': int(line['menu_item_id']),
+                    'item_name': line.get('item_name'),
+                    'quantity': int(line.get('quantity') or 1),
+                    'unit_price': optional(line.get('unit_price'), float)}
+                   for line in lines]
+
+
+def batches(records: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def import_users(engine, records: Iterable[dict]) -> int:
+    return bulk_insert(engine, User, map(to_user_params, records))
+
+
+def import_menu_items(engine, records: Iterable[dict]) -> int:
+    return bulk_insert(engine, MenuItem, map(to_menu_item_params, records))
+
+
+def import_orders(engine, records: Iterable[dict]) -> int:
+    # Orders and their lines go in together, one executemany per table
+    # per batch; the summaries are rebuilt once at the end and the change
+    # log gets one reset row rather than one per order
+    count = 0
+    with engine.begin() as connection, summaries_suspended(connection), \
+            order_changes_suspended(connection):
+        for batch in batches(map(to_order_params, records)):
+            connection.execute(insert(Order),
+                               [order for order, _ in batch])
+            lines = [line for _, order_lines in batch for line in order_lines]
+            if lines:
+                connection.execute(insert(OrderMenuItems), lines)
+            count += len(batch)
+    return count
+
+
+def bulk_insert(engine, model, params: Iterable[dict]) -> int:
+    # A single transaction for the whole import, written with one
+    # executemany per batch instead of an ORM flush per row
+    count = 0
+    with engine.begin() as connection:
+        for batch in batches(params):
+            # Rows without an id let SQLite assign one
+            with_ids = [row for row in batch if row['id'] is not None]
+            without_ids = [{key: value for key, value in row.items()
+                            if key != 'id'}
+                           for row in batch if row['id'] is None]
+            for rows in (with_ids, without_ids):
+                if rows:
+                    connection.execute(insert(model), rows)
+            count += len(batch)
+    return count
+
+
+IMPORTERS = {
+    'users': import_users,
+    'menu': import_menu_items,
+    'orders': import_orders,
+}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from services import engine
+
+    parser = argparse.ArgumentParser(
+        description="Export or import pizzeria data as CSV or JSONL")
+    parser.add_argument('action', choices=('export', 'import'))
+    parser.add_argument('table', choices=tuple(TABLES))
+    parser.add_argument('path')
+    args = parser.parse_args()
+    file_format = 'csv' if args.path.endswith('.csv') else 'jsonl'
+
+    if args.action == 'export':
+        with open(args.path, 'w', newline='', encoding='utf-8') as file:
+            written = export_table(engine, args.table, file, file_format)
+        print(f"Exported {written} {args.table} records to {args.path}")
+    else:
+        with open(args.path, newline='', encoding='utf-8') as file:
+            imported = IMPORTERS[args.table](
+                engine, read_records(file, file_format))
+        print(f"Imported {imported} {args.table} records from {args.path}")
@@ -0,0 +1,244 @@
+from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp, sp
+from kivy.properties import (BooleanProperty, ColorProperty, ListProperty,
+                             ObjectProperty)
+from kivy.uix.checkbox import CheckBox
+from kivy.uix.image import Image
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.widget import Widget
+from kivymd.uix.button import MDRaisedButton, MDRectangleFlatButton
+from kivymd.uix.card import MDCard
+from kivymd.uix.label import MDLabel
+
+from models import OrderStatus
+
+status_colors = {
+    OrderStatus.CREATED: "[color=008080]",  # Green color
+    OrderStatus.COOKING: "[color=FFD700]",  # Gold color
+    OrderStatus.READY: "[color=FFA500]",  # Orange color
+    OrderStatus.DONE: "[color=32CD32]",  # Lime Green color
+    OrderStatus.CANCELLED: "[color=FF0000]"  # Red color
+}
+
+
+def build_recycle_view(viewclass, row_height: float,
+                       row_width: float | None = None) -> RecycleView:
+    # Only the rows in view get widgets; scrolling rebinds them to new data
+    recycle_view = RecycleView()
+    layout = RecycleBoxLayout(orientation='vertical', padding=dp(12),
+                              spacing=dp(12), size_hint_y=None,
+                              default_size=(row_width, row_height),
+                              default_size_hint=(
+                                  None if row_width else 1, None))
+    layout.bind(minimum_height=layout.setter('height'))
+    recycle_view.add_widget(layout)
+    # viewclass is forwarded to the layout manager, so it must exist first
+    recycle_view.viewclass = viewclass
+    return recycle_view
+
+
+def order_label() -> MDLabel:
+    return MDLabel(font_size=sp(16), markup=True)
+
+
+def loading_label() -> MDLabel:
+    # Shown over a list while its rows are fetched in the background
+    return MDLabel(text="Loading...", halign='center', opacity=0)
+
+
+class BarChart(Widget):
+    # Bars scaled to the tallest value, redrawn whenever values or size change
+    values = ListProperty()
+    bar_color = ColorProperty("#008080")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(pos=self.redraw, size=self.redraw, values=self.redraw,
+                  bar_color=self.redraw)
+
+    def redraw(self, *_):
+        self.canvas.clear()
+        if not self.values:
+            return
+        peak = max(self.values) or 1
+        slot = self.width / len(self.values)
+        with self.canvas:
+            Color(rgba=self.bar_color)
+            for i, value in enumerate(self.values):
+                Rectangle(pos=(self.x + i * slot + 1, self.y),
+                          size=(max(slot - 2, 1), self.height * value / peak))
+
+
+class QueryStatsOverlay(MDLabel):
+    # The last sampled actions with their query counts, newest first;
+    # likely N+1s in red. Refreshes itself while shown.
+
+    def __init__(self, tracker, **kwargs):
+        super().__init__(markup=True, valign='top', font_size=sp(12),
+                         padding=(dp(8), dp(8)), size_hint=(None, None),
+                         size=(dp(460), dp(320)), **kwargs)
+        self.md_bg_color = (1, 1, 1, 0.85)
+        self.tracker = tracker
+        self.refresh_event = None
+
+    def on_parent(self, _, parent):
+        if parent is not None:
+            self.refresh()
+            self.refresh_event = Clock.schedule_interval(self.refresh, 1)
+        elif self.refresh_event is not None:
+            self.refresh_event.cancel()
+
+    def refresh(self, *_):
+        lines = []
+        for stats in reversed(self.tracker.recent()):
+            line = (f"{stats.name}: {stats.queries} queries, "
+                    f"{stats.seconds * 1000:.1f} ms, {stats.rows} rows")
+            if stats.repeated:
+                line = (f"[color=FF0000]{line}, N+1 "
+                        f"x{stats.repeated[0][1]}[/color]")
+            lines.append(line)
+        self.text = '\n'.join(lines) or "No sampled queries yet"
+
+
+class RecycleCard(RecycleDataViewBehavior, MDCard):
+    # Each data dict carries a `row` (a read model) plus handlers
+    row = ObjectProperty(None, allownone=True)
+    index = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+
+class AdminOrderCard(RecycleCard):
+    status_handler = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(padding=dp(16), spacing=dp(8), **kwargs)
+        self.labels = [order_label() for _ in range(8)]
+        for label in self.labels:
+            self.add_widget(label)
+        # Add button for controlling order status
+        status_button = MDRectangleFlatButton(text='Change status',
+                                              size_hint=(None, None),
+                                              size=(dp(150), dp(50)))
+        status_button.bind(on_release=self.show_status_menu)
+        self.add_widget(status_button)
+
+    def on_row(self, _, order):
+        if order is None:
+            return
+        texts = (
+            f"[color=008080]Order ID:[/color] {order.id}",
+            f"[color=008080]Created at:[/color] {order.created_at.strftime('%m/%d/%Y, %H:%M:%S')}",
+            f"[color=008080]Status:[/color] {order.status}",
+            f"[color=008080]Guest name:[/color] {order.first_name}",
+            f"[color=008080]Guest last name:[/color] {order.last_name}",
+            f"[color=008080]Guest phone number:[/color] {order.phone_number}",
+            f"[color=008080]Menu Items:[/color]\n{list(order.menu_items)}",
+            f"[color=008080]Total price of order:[/color] {order.total_price}",
+        )
+        for label, text in zip(self.labels, texts):
+            label.text = text
+
+    def show_status_menu(self, button):
+        button.order_id = self.row.id
+        self.status_handler(button)
+
+
+class GuestOrderCard(RecycleCard):
+
+    def __init__(self, **kwargs):
+        super().__init__(padding=dp(16), spacing=dp(8), **kwargs)
+        self.labels = [order_label() for _ in range(5)]
+        for label in self.labels:
+            self.add_widget(label)
+
+    def on_row(self, _, order):
+        if order is None:
+            return
+        texts = (
+            f"[color=008080]Order ID:[/color] {order.id}",
+            f"[color=008080]Created at:[/color] {order.created_at.strftime('%m/%d/%Y, %H:%M:%S')}",
+            f"[color=008080]Status:[/color] [b]{status_colors[order.status]}{order.status.title()}[/b][/color] ",
+            f"[color=008080]Menu Items:[/color]\n{list(order.menu_items)}",
+            f"[color=008080]Total price of order:[/color] {order.total_price}",
+        )
+        for label, text in zip(self.labels, texts):
+            label.text = text
+
+
+class MenuItemCard(RecycleCard):
+    # texture_loader maps an image key to a texture (or None)
+    texture_loader = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(padding=dp(16), spacing=dp(8), **kwargs)
+        self.md_bg_color = "#E0E0E0"
+        self.name_label = MDLabel(halign='center', font_style='H6')
+        self.price_label = MDLabel(halign='center')
+        self.weight_label = MDLabel(halign='center')
+        self.radius_label = MDLabel(halign='center')
+        self.description_label = MDLabel(halign='left')
+        self.image = Image()
+        self.add_content()
+
+    def add_content(self):
+        self.add_widget(self.name_label)
+        self.add_widget(self.price_label)
+        self.add_widget(self.weight_label)
+        self.add_widget(self.radius_label)
+        self.add_widget(self.description_label)
+        self.add_widget(self.image)
+
+    def on_row(self, _, item):
+        if item is None:
+            return
+        self.name_label.text = item.name
+        self.price_label.text = f"Price: ${item.price}"
+        self.weight_label.text = f"Weight: {item.weight}"
+        self.radius_label.text = f"Radius: {item.radius}"
+        self.description_label.text = item.description
+        texture = self.texture_loader(item.image_key)
+        self.image.texture = texture
+        self.image.opacity = 1 if texture is not None else 0
+
+
+class GuestMenuItemCard(MenuItemCard):
+    selected = BooleanProperty(False)
+    select_handler = ObjectProperty(None, allownone=True)
+
+    def add_content(self):
+        self.checkbox = CheckBox(size_hint=(None, None), size=(dp(48), dp(48)))
+        self.checkbox.bind(active=self.on_checkbox_active)
+        self.add_widget(self.checkbox)
+        super().add_content()
+
+    def on_selected(self, _, selected):
+        self.checkbox.active = selected
+
+    def on_checkbox_active(self, _, value):
+        # Also fires when a recycled view is rebound to another row
+        if value != self.selected:
+            self.selected = value
+            self.select_handler(self.index, self.row, value)
+
+
+class AdminMenuItemCard(MenuItemCard):
+    edit_handler = ObjectProperty(None, allownone=True)
+    delete_handler = ObjectProperty(None, allownone=True)
+
+    def add_content(self):
+        super().add_content()
+        # Add an "Edit" button to each menu item card
+        edit_button = MDRaisedButton(text="Edit", size_hint=(None, None),
+                                     size=(100, 50))
+        edit_button.bind(on_release=lambda _: self.edit_handler(self.row))
+        delete_button = MDRaisedButton(text="Delete", size_hint=(None, None),
+                                       size=(100, 50))
+        delete_button.bind(on_release=lambda _: self.delete_handler(self.row))
+        self.add_widget(edit_button)
+        self.add_widget(delete_button)